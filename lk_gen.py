@@ -2,13 +2,6 @@
 
 import subprocess, datetime, os
 
-is_stl = True
-
-if is_stl:
-    outfile = 'lk.stl'
-else:
-    outfile = 'lk.scad'
-
 ## `russiandollmaze.scad`
 # p=2*1;	    // Paths
 # s=5*1;	    // Spacing (unit)
@@ -85,10 +78,10 @@ else:
 # |        28 |  0.133 in |  3.378 mm |        in | vert wall bottom-bottom     |
 #
 
-command = [
+# Options shared by every part; run() adds --part, --out-file and --stl.
+BASE_CMD = tuple(map(str, (
     './puzzlebox',
     '--parts', 6,            # 5 parts, 4 mazes
-    '--part', 2,             # which part? (0:all, 1:innermost, ..., <n>:outer)
     '--core-diameter', 15,   # size of empty space in smallest
     '--core-height', 75,     # height of the innermost piece
     '--nubs', 2,             # count of nubs (2,3)
@@ -110,17 +103,26 @@ command = [
 
     '--maze-complexity', 10, # [-10, +10]
     '--outer-sides', 0,      # side count (0: round)
+)))
+
+def run(part, is_stl=True, outfile=None):
+    # part: which part? (0:all, 1:innermost, ..., <n>:outer)
+    if outfile is None:
+        outfile = 'lk.stl' if is_stl else 'lk.scad'
+
+    command = [*BASE_CMD, '--part', str(part), '--out-file', outfile]
+    if is_stl:
+        command.append('--stl')
+
+    started = datetime.datetime.now()
+    subprocess.run(command)
+    elapsed = datetime.datetime.now() - started
+    info = os.stat(outfile)
+    print(f'{outfile}: {info.st_size/1024/1024:.2f} MiB\n    {elapsed}')
 
-    '--out-file', outfile,
-]
-if is_stl:
-    command.append('--stl')
 
-started = datetime.datetime.now()
-subprocess.run(list(map(str,command)))
-elapsed = datetime.datetime.now() - started
-info = os.stat(outfile)
-print(f'{outfile}: {info.st_size/1024/1024:.2f} MiB\n    {elapsed}')
+if __name__ == '__main__':
+    run(2)
 
 
 # Info
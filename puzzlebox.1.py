@@ -13,12 +13,12 @@ features small and readable so you can iterate.
 """
 
 import argparse
+import array
+import functools
 import math
 import random
 import sys
 import os
-import tempfile
-import subprocess
 
 FLAGL = 0x01
 FLAGR = 0x02
@@ -31,15 +31,18 @@ BIASR = 1
 BIASU = 1
 BIASD = 4
 
-# Buffer for optional STL/comment output (mirrors C appendmazedata)
-comments_buffer = []
+# Buffer for optional STL/comment output (mirrors C appendmazedata); kept as
+# UTF-8 bytes, one newline-terminated line per call, ready to write out as is
+comments_buffer = bytearray()
 
 def appendmazedata(fmt, *args):
     if args:
         s = fmt % args
     else:
         s = fmt
-    comments_buffer.append(s)
+    if not s.endswith('\n'):
+        s += '\n'
+    comments_buffer.extend(s.encode('utf-8'))
 
 
 def normalise(t):
@@ -58,36 +61,56 @@ def test_cell(maze, W, H, helix, nubs, x, y):
     """Match C's `test()` semantics: wrap X into [0,W) adjusting Y by helix,
     OR across nub repeats, and handle the helix==nubs special-case.
     """
-    n = nubs
+    if not nubs:
+        return 0
+    # wrap x into [0,W) in one step, moving y by helix per turn like C
+    q, xx = divmod(x, W)
+    yy = y + helix * q
+    if nubs == 1:
+        # single cell, nothing to OR in
+        return maze[xx + yy * W] if 0 <= yy < H else FLAGI
+    step = W // nubs
+    if not helix:
+        # every nub is on the same row, so it is in range for all or none
+        if not 0 <= y < H:
+            return FLAGI
+        row = y * W
+        v = 0
+        for _ in range(nubs):
+            v |= maze[xx + row]
+            xx += step
+            if xx >= W:
+                xx -= W
+        return v
+    # special case from C: if helix == nubs then decrement y per nub
+    drop = 1 if helix == nubs else 0
     v = 0
-    xx = x
-    yy = y
-    while n:
-        # wrap xx into [0,W) adjusting yy like C
-        while xx < 0:
-            xx += W
-            yy -= helix
-        while xx >= W:
-            xx -= W
-            yy += helix
-        if yy < 0 or yy >= H:
-            v |= FLAGI
-        else:
+    for _ in range(nubs):
+        if 0 <= yy < H:
             v |= maze[xx + yy * W]
-        n -= 1
-        if n == 0:
-            break
-        xx += W // nubs
-        while xx >= W:
+        else:
+            v |= FLAGI
+        # step to the next nub; step <= W, so at most one wrap
+        xx += step
+        if xx >= W:
             xx -= W
             yy += helix
-        # special case from C: if helix == nubs then decrement y
-        if helix == nubs:
-            yy -= 1
+        yy -= drop
     return v
 
 
+# Helpers to emulate C's signed 32-bit random ints and remainder semantics
+def c_rand32(rng):
+    u = rng.getrandbits(32)
+    # interpret as signed 32-bit like C `int`
+    if u & 0x80000000:
+        return u - 0x100000000
+    return u
+
+
 class MazeResult:
+    # Grids are flat W*H byte buffers indexed [x + y * W]; bytearray keeps
+    # single-cell access cheap and whole rows/columns available as slices.
     def __init__(self, W, H, helix, nubs):
         self.W = W
         self.H = H
@@ -95,7 +118,7 @@ class MazeResult:
         self.nubs = nubs
         self.maze = bytearray(W * H)
         self.maze_viz = bytearray(W * H)
-        self.solution = bytearray(b' ' * (W * H))
+        self.solution = bytearray(b' ') * (W * H)
         self.reachable = bytearray(W * H)
         self.minY = 0
         self.maxY = H - 1
@@ -105,6 +128,87 @@ class MazeResult:
         self.entrance_x = -1
 
 
+def carve_maze(maze, W, H, helix, nubs, mazecomplexity, flip, inside, X, Y, rng,
+               rand_log=None, carve_log=None):
+    """Full C-style recursive-backtracking carving with biased choices,
+    starting from (X, Y). Runs the whole carve in one call and returns maxx,
+    the end column of the longest path to reach the top. Debug entries are
+    appended to rand_log/carve_log when given.
+    """
+    maxx = 0
+    maxlen = 0
+    # C's pos linked list, as a deque of packed ints: n << 32 | Y << 16 | X
+    # (cells are always in range, so X and Y fit 16 bits)
+    from collections import deque
+    pos = deque([Y << 16 | X])
+    # main loop
+    while pos:
+        p = pos.popleft()
+        X = p & 0xFFFF; Y = (p >> 16) & 0xFFFF; p_n = p >> 32
+        # compute available directions with bias (each tested once; the maze
+        # does not change until a direction is picked)
+        can_r = not test_cell(maze, W, H, helix, nubs, X + 1, Y)
+        can_l = not test_cell(maze, W, H, helix, nubs, X - 1, Y)
+        can_d = not test_cell(maze, W, H, helix, nubs, X, Y - 1)
+        can_u = not test_cell(maze, W, H, helix, nubs, X, Y + 1)
+        n = can_r * BIASR + can_l * BIASL + can_d * BIASD + can_u * BIASU
+        if n == 0:
+            continue
+        # v = read 32-bit (emulate C signed 32-bit then C remainder)
+        raw = c_rand32(rng)
+        if rand_log is not None and len(rand_log) < 400:
+            rand_log.append(('R', len(rand_log), raw, n))
+        # C remainder truncates toward zero, so v takes raw's sign (n > 0)
+        v = raw % n if raw >= 0 else -(-raw % n)
+        # pick direction
+        if can_r and (v - BIASR) < 0:
+            maze[X + Y * W] |= FLAGR
+            X += 1
+            if X >= W:
+                X -= W; Y += helix
+            maze[X + Y * W] |= FLAGL
+        elif can_l and (v - BIASR - BIASL) < 0:
+            maze[X + Y * W] |= FLAGL
+            X -= 1
+            if X < 0:
+                X += W; Y -= helix
+            maze[X + Y * W] |= FLAGR
+        elif can_d and (v - BIASR - BIASL - BIASD) < 0:
+            maze[X + Y * W] |= FLAGD
+            Y -= 1
+            maze[X + Y * W] |= FLAGU
+        elif can_u and (v - BIASR - BIASL - BIASD - BIASU) < 0:
+            maze[X + Y * W] |= FLAGU
+            Y += 1
+            maze[X + Y * W] |= FLAGD
+        else:
+            # fallback (shouldn't happen)
+            continue
+        # update maxx like C
+        if p_n > maxlen and (test_cell(maze, W, H, helix, nubs, X, Y + 1) & FLAGI) and (not flip or inside or not (X % (W // nubs))):
+            maxlen = p_n; maxx = X
+        # create next
+        nextp = (p_n + 1) << 32 | Y << 16 | X
+        # second random for queue placement (C-style signed 32-bit & remainder)
+        raw2 = c_rand32(rng)
+        if rand_log is not None and len(rand_log) < 400:
+            rand_log.append(('S', len(rand_log), raw2, 10))
+        v = raw2 % 10 if raw2 >= 0 else -(-raw2 % 10)  # C remainder, as above
+        if carve_log is not None and len(carve_log) < 1000:
+            carve_log.append((p_n, p & 0xFFFF, (p >> 16) & 0xFFFF, X, Y, raw, raw2, v))
+        if v < ( -mazecomplexity if mazecomplexity < 0 else mazecomplexity ):
+            # add at start
+            pos.appendleft(nextp)
+        else:
+            pos.append(nextp)
+        if mazecomplexity <= 0 and v < -mazecomplexity:
+            # current p to start
+            pos.appendleft(p)
+        else:
+            pos.append(p)
+    return maxx
+
+
 def generate_maze(r, inside, mazethickness, basethickness, baseheight, basegap,
                   mazestep, helix, nubs, testmaze, mazecomplexity, flip, noa,
                   parkvertical, mazemargin, height, part=1, coresolid=0, coreheight=0,
@@ -131,27 +235,11 @@ def generate_maze(r, inside, mazethickness, basethickness, baseheight, basegap,
     maze = mr.maze
 
     # RNG used to emulate C's reads from /dev/urandom (deterministic if seed provided)
-    # Provide helpers to emulate signed 32-bit int and C's remainder semantics
     if seed is None:
         rng = random.Random()
     else:
         rng = random.Random(seed)
 
-    def c_rand32(rng):
-        u = rng.getrandbits(32)
-        # interpret as signed 32-bit like C `int`
-        if u & 0x80000000:
-            return u - 0x100000000
-        return u
-
-
-    def c_mod(signed_val, m):
-        # emulate C remainder: quotient truncates toward zero
-        if m == 0:
-            return 0
-        q = int(signed_val / m)
-        return signed_val - q * m
-
     # Debug logging support
     maze_debug = os.getenv('MAZE_DEBUG') is not None
     rand_log = []
@@ -169,10 +257,21 @@ def generate_maze(r, inside, mazethickness, basethickness, baseheight, basegap,
     dy = 0.0
     if helix:
         dy = mazestep * helix / W
+    lo = base + mazestep / 2 + mazestep / 8
+    hi = height - mazestep / 2 - mazemargin - mazestep / 8
+    invalid_row = bytes([FLAGI]) * W
     for Y in range(H):
+        row = mazestep * Y + y0
+        # yval is monotonic along the row, so its ends bound the whole row
+        ends = (row, row + dy * (W - 1))
+        if lo <= min(ends) and max(ends) <= hi:
+            continue
+        if max(ends) < lo or min(ends) > hi:
+            maze[Y * W:(Y + 1) * W] = invalid_row  # maze is still all zero here
+            continue
         for X in range(W):
-            yval = mazestep * Y + y0 + dy * X
-            if yval < base + mazestep / 2 + mazestep / 8 or yval > height - mazestep / 2 - mazemargin - mazestep / 8:
+            yval = row + dy * X
+            if yval < lo or yval > hi:
                 maze[X + Y * W] |= FLAGI
 
     # simple park vertical handling
@@ -253,11 +352,37 @@ def generate_maze(r, inside, mazethickness, basethickness, baseheight, basegap,
 
     maxx = 0
     if testmaze:
+        # Only FLAGR/FLAGL get set below, so the FLAGI part of test_cell is
+        # fixed: work it out once per cell, and reuse X+1's for t1 at X
+        inv = bytearray(W * H)
         for Y in range(H):
             for X in range(W):
-                t0 = test_cell(maze, W, H, helix, nubs, X, Y)
-                t1 = test_cell(maze, W, H, helix, nubs, X + 1, Y)
-                if maze_debug:
+                inv[X + Y * W] = test_cell(maze, W, H, helix, nubs, X, Y) & FLAGI
+        if not maze_debug:
+            # Same pattern as the traced loop below, without the tracing
+            for Y in range(H):
+                for X in range(W):
+                    if inv[X + Y * W]:
+                        continue
+                    if X + 1 < W:
+                        if inv[X + 1 + Y * W]:
+                            continue
+                        maze[X + Y * W] |= FLAGR
+                        maze[X + 1 + Y * W] |= FLAGL
+                    elif not (test_cell(maze, W, H, helix, nubs, X + 1, Y) & FLAGI):
+                        maze[X + Y * W] |= FLAGR
+                        if 0 <= Y + helix < H:
+                            maze[(Y + helix) * W] |= FLAGL
+        else:
+            for Y in range(H):
+                for X in range(W):
+                    i0 = inv[X + Y * W]
+                    if X + 1 < W:
+                        i1 = inv[X + 1 + Y * W]
+                    else:
+                        i1 = test_cell(maze, W, H, helix, nubs, X + 1, Y) & FLAGI
+                    t0 = test_cell(maze, W, H, helix, nubs, X, Y)
+                    t1 = test_cell(maze, W, H, helix, nubs, X + 1, Y)
                     # write each TEST_CELL line like the C debug log for easy comparison
                     if py_df:
                         try:
@@ -266,25 +391,25 @@ def generate_maze(r, inside, mazethickness, basethickness, baseheight, basegap,
                             pass
                     if len(test_log) < 200:
                         test_log.append((X, Y, t0, t1))
-                if not (t0 & FLAGI) and not (t1 & FLAGI):
-                    maze[X + Y * W] |= FLAGR
-                    if maze_debug and py_df and (X % (W) < 4 or Y <= 4):
-                        try:
-                            py_df.write(f"SET X={X} Y={Y} old={(maze[X+Y*W]-FLAGR):02X} new={maze[X+Y*W]:02X} reason=TEST_FLAGR\n")
-                        except Exception:
-                            pass
-                    x2 = X + 1
-                    y2 = Y
-                    if x2 >= W:
-                        x2 -= W
-                        y2 += helix
-                    if 0 <= x2 < W and 0 <= y2 < H:
-                        maze[x2 + y2 * W] |= FLAGL
-                        if maze_debug and py_df and (x2 < 4 or y2 <= 4):
+                    if not i0 and not i1:
+                        maze[X + Y * W] |= FLAGR
+                        if py_df and (X % (W) < 4 or Y <= 4):
                             try:
-                                py_df.write(f"SET X={x2} Y={y2} old={0:02X} new={maze[x2+y2*W]:02X} reason=TEST_FLAGL\n")
+                                py_df.write(f"SET X={X} Y={Y} old={(maze[X+Y*W]-FLAGR):02X} new={maze[X+Y*W]:02X} reason=TEST_FLAGR\n")
                             except Exception:
                                 pass
+                        x2 = X + 1
+                        y2 = Y
+                        if x2 >= W:
+                            x2 -= W
+                            y2 += helix
+                        if 0 <= x2 < W and 0 <= y2 < H:
+                            maze[x2 + y2 * W] |= FLAGL
+                            if py_df and (x2 < 4 or y2 <= 4):
+                                try:
+                                    py_df.write(f"SET X={x2} Y={y2} old={0:02X} new={maze[x2+y2*W]:02X} reason=TEST_FLAGL\n")
+                                except Exception:
+                                    pass
         # Match C: extend maxx to the right while the cell at H-2 is valid
         if (not flip) or inside:
             while maxx + 1 < W and not (test_cell(maze, W, H, helix, nubs, maxx + 1, H - 2) & FLAGI):
@@ -299,15 +424,7 @@ def generate_maze(r, inside, mazethickness, basethickness, baseheight, basegap,
                             pass
                 maxx += 1
     else:
-        # Full C-style recursive-backtracking carving with biased choices
-        maxlen = 0
-        # pos linked-list emulation: use Python objects with next pointer
-        class Pos:
-            __slots__ = ('x', 'y', 'n', 'next')
-            def __init__(self, x, y, n=0):
-                self.x = x; self.y = y; self.n = n; self.next = None
-
-        # Establish starting X,Y consistent with C's park handling
+        # Carve from a starting X,Y consistent with C's park handling
         if parkvertical:
             X = 0
             Y = helix + 1 if helix + 1 < H else 0
@@ -321,97 +438,8 @@ def generate_maze(r, inside, mazethickness, basethickness, baseheight, basegap,
             X = max(0, X - 1)
             Y = min(H - 1, Y + 1)
 
-        pos = Pos(X, Y, 0)
-        last = pos
-        # main loop
-        while pos:
-            p = pos
-            pos = p.next
-            p.next = None
-            if not pos:
-                last = None
-            X = p.x; Y = p.y
-            # compute available directions with bias
-            n = 0
-            if not test_cell(maze, W, H, helix, nubs, X + 1, Y):
-                n += BIASR
-            if not test_cell(maze, W, H, helix, nubs, X - 1, Y):
-                n += BIASL
-            if not test_cell(maze, W, H, helix, nubs, X, Y - 1):
-                n += BIASD
-            if not test_cell(maze, W, H, helix, nubs, X, Y + 1):
-                n += BIASU
-            if n == 0:
-                continue
-            # v = read 32-bit (emulate C signed 32-bit then C remainder)
-            raw = c_rand32(rng)
-            if maze_debug and len(rand_log) < 400:
-                rand_log.append(('R', len(rand_log), raw, n))
-            v = c_mod(raw, n)
-            # pick direction
-            if (not test_cell(maze, W, H, helix, nubs, X + 1, Y)) and (v - BIASR) < 0:
-                maze[X + Y * W] |= FLAGR
-                X += 1
-                if X >= W:
-                    X -= W; Y += helix
-                maze[X + Y * W] |= FLAGL
-            elif (not test_cell(maze, W, H, helix, nubs, X - 1, Y)) and (v - BIASR - BIASL) < 0:
-                maze[X + Y * W] |= FLAGL
-                X -= 1
-                if X < 0:
-                    X += W; Y -= helix
-                maze[X + Y * W] |= FLAGR
-            elif (not test_cell(maze, W, H, helix, nubs, X, Y - 1)) and (v - BIASR - BIASL - BIASD) < 0:
-                maze[X + Y * W] |= FLAGD
-                Y -= 1
-                maze[X + Y * W] |= FLAGU
-            elif (not test_cell(maze, W, H, helix, nubs, X, Y + 1)) and (v - BIASR - BIASL - BIASD - BIASU) < 0:
-                maze[X + Y * W] |= FLAGU
-                Y += 1
-                maze[X + Y * W] |= FLAGD
-            else:
-                # fallback (shouldn't happen)
-                continue
-            # update maxx like C
-            if p.n > maxlen and (test_cell(maze, W, H, helix, nubs, X, Y + 1) & FLAGI) and (not flip or inside or not (X % (W // nubs))):
-                maxlen = p.n; maxx = X
-            # create next
-            nextp = Pos(X, Y, p.n + 1)
-            # second random for queue placement (C-style signed 32-bit & remainder)
-            raw2 = c_rand32(rng)
-            if maze_debug and len(rand_log) < 400:
-                rand_log.append(('S', len(rand_log), raw2, 10))
-            v = c_mod(raw2, 10)
-            if maze_debug and len(carve_log) < 1000:
-                carve_log.append((p.n, p.x if hasattr(p,'x') else None, p.y if hasattr(p,'y') else None, X, Y, raw, raw2, v))
-            if v < ( -mazecomplexity if mazecomplexity < 0 else mazecomplexity ):
-                # add at start
-                if not pos:
-                    last = nextp
-                nextp.next = pos
-                pos = nextp
-            else:
-                if last:
-                    last.next = nextp
-                else:
-                    pos = nextp
-                last = nextp
-            if mazecomplexity <= 0 and v < -mazecomplexity:
-                # current p to start
-                if not pos:
-                    last = p
-                p.next = pos
-                pos = p
-            else:
-                if last:
-                    last.next = p
-                else:
-                    pos = p
-                last = p
-        # end carving
-        # (optional) log path length
-        # mr.pathlen = maxlen
-        # end else
+        maxx = carve_maze(maze, W, H, helix, nubs, mazecomplexity, flip, inside, X, Y, rng,
+                          rand_log if maze_debug else None, carve_log if maze_debug else None)
 
     mr.maxx = maxx
 
@@ -441,97 +469,87 @@ def generate_maze(r, inside, mazethickness, basethickness, baseheight, basegap,
     mr.entrya = 360.0 * maxx / W
     mr.mazeexit = mr.entrya
 
-    # mark entry positions
-    for X in range(maxx % (W // nubs), W, W // nubs):
+    # mark entry positions: open each entry column from the top down through
+    # its invalid cells to the first valid one
+    stride = W // nubs
+    for X in range(maxx % stride, W, stride):
+        column = maze[X::W]
         Y = H - 1
-        while Y and (maze[X + Y * W] & FLAGI):
-            maze[X + (Y) * W] |= FLAGU | FLAGD
+        while Y and (column[Y] & FLAGI):
             Y -= 1
+        maze[X + (Y + 1) * W::W] = bytes(c | FLAGU | FLAGD for c in column[Y + 1:])
         maze[X + Y * W] |= FLAGU
 
-    # determine minY/maxY
-    minY = 0
-    maxY = H - 1
-    for Y in range(H):
-        all_invalid = True
-        for X in range(W):
-            if not (maze[X + Y * W] & FLAGI):
-                all_invalid = False
-                break
-        if not all_invalid:
-            minY = Y
-            break
-    for Y in range(H-1, -1, -1):
-        all_invalid = True
-        for X in range(W):
-            if not (maze[X + Y * W] & FLAGI):
-                all_invalid = False
-                break
-        if not all_invalid:
-            maxY = Y
-            break
+    # determine minY/maxY: FLAGI is the top bit, so a row has a valid cell
+    # exactly when its smallest byte is below FLAGI
+    valid_rows = [Y for Y in range(H) if min(maze[Y * W:(Y + 1) * W]) < FLAGI]
+    minY = valid_rows[0] if valid_rows else 0
+    maxY = valid_rows[-1] if valid_rows else H - 1
     mr.minY = minY
     mr.maxY = maxY
 
     # copy to maze_viz
-    mr.maze_viz[:] = mr.maze[:]
+    maze_viz = mr.maze_viz
+    reachable = mr.reachable
+    maze_viz[:] = maze
 
     # Replicate maze data by BFS copying to opposite sector when nubs > 1 (match C behavior)
     if nubs > 1:
         from collections import deque
-        visited = [[False] * H for _ in range(W)]
+        visited = bytearray(W * H)
         dq = deque()
         sx = mr.maxx
         sy = mr.maxY
         if 0 <= sx < W and 0 <= sy < H:
             dq.append((sx, sy))
-            visited[sx][sy] = True
+            visited[sx + sy * W] = 1
             opp_x = (sx + W // nubs) % W
             opp_y = sy
-            mr.maze_viz[opp_x + opp_y * W] = mr.maze_viz[sx + sy * W]
+            maze_viz[opp_x + opp_y * W] = maze_viz[sx + sy * W]
 
         while dq:
             cx, cy = dq.popleft()
+            cell = maze[cx + cy * W]
             # Right
-            if mr.maze[cx + cy * W] & FLAGR:
+            if cell & FLAGR:
                 nx = cx + 1; ny = cy
                 if nx >= W:
                     nx -= W; ny += helix
-                if 0 <= nx < W and 0 <= ny < H and not visited[nx][ny]:
-                    visited[nx][ny] = True
+                if 0 <= nx < W and 0 <= ny < H and not visited[nx + ny * W]:
+                    visited[nx + ny * W] = 1
                     dq.append((nx, ny))
                     opp_x = (nx + W // nubs) % W
                     opp_y = ny
-                    mr.maze_viz[opp_x + opp_y * W] = mr.maze_viz[nx + ny * W]
+                    maze_viz[opp_x + opp_y * W] = maze_viz[nx + ny * W]
             # Left
-            if mr.maze[cx + cy * W] & FLAGL:
+            if cell & FLAGL:
                 nx = cx - 1; ny = cy
                 if nx < 0:
                     nx += W; ny -= helix
-                if 0 <= nx < W and 0 <= ny < H and not visited[nx][ny]:
-                    visited[nx][ny] = True
+                if 0 <= nx < W and 0 <= ny < H and not visited[nx + ny * W]:
+                    visited[nx + ny * W] = 1
                     dq.append((nx, ny))
                     opp_x = (nx + W // nubs) % W
                     opp_y = ny
-                    mr.maze_viz[opp_x + opp_y * W] = mr.maze_viz[nx + ny * W]
+                    maze_viz[opp_x + opp_y * W] = maze_viz[nx + ny * W]
             # Up
-            if mr.maze[cx + cy * W] & FLAGU:
+            if cell & FLAGU:
                 nx = cx; ny = (cy + 1) % H
-                if 0 <= nx < W and 0 <= ny < H and not visited[nx][ny]:
-                    visited[nx][ny] = True
+                if 0 <= nx < W and 0 <= ny < H and not visited[nx + ny * W]:
+                    visited[nx + ny * W] = 1
                     dq.append((nx, ny))
                     opp_x = (nx + W // nubs) % W
                     opp_y = ny
-                    mr.maze_viz[opp_x + opp_y * W] = mr.maze_viz[nx + ny * W]
+                    maze_viz[opp_x + opp_y * W] = maze_viz[nx + ny * W]
             # Down
-            if mr.maze[cx + cy * W] & FLAGD:
+            if cell & FLAGD:
                 nx = cx; ny = (cy - 1 + H) % H
-                if 0 <= nx < W and 0 <= ny < H and not visited[nx][ny]:
-                    visited[nx][ny] = True
+                if 0 <= nx < W and 0 <= ny < H and not visited[nx + ny * W]:
+                    visited[nx + ny * W] = 1
                     dq.append((nx, ny))
                     opp_x = (nx + W // nubs) % W
                     opp_y = ny
-                    mr.maze_viz[opp_x + opp_y * W] = mr.maze_viz[nx + ny * W]
+                    maze_viz[opp_x + opp_y * W] = maze_viz[nx + ny * W]
 
     # entrance_x
     entrance_x = -1
@@ -545,41 +563,47 @@ def generate_maze(r, inside, mazethickness, basethickness, baseheight, basegap,
     if entrance_x >= 0:
         from collections import deque
         q = deque()
-        parent = { (entrance_x, minY): None }
+        # visited flags and parent cell index (-1 for the start), by x + y * W
+        seen = bytearray(W * H)
+        parent = array.array('i', [-1]) * (W * H)
+        seen[entrance_x + minY * W] = 1
         q.append((entrance_x, minY))
         found = False
         while q and not found:
             cx, cy = q.popleft()
+            ci = cx + cy * W
+            cell = maze[ci]
             if cx == mr.maxx and cy == mr.maxY:
                 found = True
                 break
             # neighbors
             # right
-            if mr.maze[cx + cy * W] & FLAGR:
+            if cell & FLAGR:
                 nx = cx + 1; ny = cy
                 if nx >= W: nx -= W; ny += helix
-                if 0 <= ny < H and not (mr.maze[nx + ny * W] & FLAGI) and (nx, ny) not in parent:
-                    parent[(nx, ny)] = (cx, cy); q.append((nx, ny))
-            if mr.maze[cx + cy * W] & FLAGL:
+                if 0 <= ny < H and not seen[nx + ny * W] and not (maze[nx + ny * W] & FLAGI):
+                    seen[nx + ny * W] = 1; parent[nx + ny * W] = ci; q.append((nx, ny))
+            if cell & FLAGL:
                 nx = cx - 1; ny = cy
                 if nx < 0: nx += W; ny -= helix
-                if 0 <= ny < H and not (mr.maze[nx + ny * W] & FLAGI) and (nx, ny) not in parent:
-                    parent[(nx, ny)] = (cx, cy); q.append((nx, ny))
-            if mr.maze[cx + cy * W] & FLAGU:
+                if 0 <= ny < H and not seen[nx + ny * W] and not (maze[nx + ny * W] & FLAGI):
+                    seen[nx + ny * W] = 1; parent[nx + ny * W] = ci; q.append((nx, ny))
+            if cell & FLAGU:
                 nx = cx; ny = cy + 1
-                if 0 <= ny < H and not (mr.maze[nx + ny * W] & FLAGI) and (nx, ny) not in parent:
-                    parent[(nx, ny)] = (cx, cy); q.append((nx, ny))
-            if mr.maze[cx + cy * W] & FLAGD:
+                if 0 <= ny < H and not seen[nx + ny * W] and not (maze[nx + ny * W] & FLAGI):
+                    seen[nx + ny * W] = 1; parent[nx + ny * W] = ci; q.append((nx, ny))
+            if cell & FLAGD:
                 nx = cx; ny = cy - 1
-                if 0 <= ny < H and not (mr.maze[nx + ny * W] & FLAGI) and (nx, ny) not in parent:
-                    parent[(nx, ny)] = (cx, cy); q.append((nx, ny))
+                if 0 <= ny < H and not seen[nx + ny * W] and not (maze[nx + ny * W] & FLAGI):
+                    seen[nx + ny * W] = 1; parent[nx + ny * W] = ci; q.append((nx, ny))
         if found:
             # reconstruct path
             path = []
-            node = (mr.maxx, mr.maxY)
-            while node is not None:
-                path.append(node)
-                node = parent.get(node)
+            node = mr.maxx + mr.maxY * W
+            while node >= 0:
+                y, x = divmod(node, W)
+                path.append((x, y))
+                node = parent[node]
             # mark solution arrows
             for i in range(len(path)-1, 0, -1):
                 cx, cy = path[i]
@@ -599,27 +623,28 @@ def generate_maze(r, inside, mazethickness, basethickness, baseheight, basegap,
     if mr.entrance_x >= 0:
         q = deque()
         q.append((mr.entrance_x, mr.minY))
-        mr.reachable[mr.entrance_x + mr.minY * W] = 1
+        reachable[mr.entrance_x + mr.minY * W] = 1
         while q:
             cx, cy = q.popleft()
-            if mr.maze[cx + cy * W] & FLAGR:
+            cell = maze[cx + cy * W]
+            if cell & FLAGR:
                 nx = cx+1; ny = cy
                 if nx>=W: nx-=W; ny+=helix
-                if 0<=ny< H and not mr.reachable[nx + ny*W] and not (mr.maze[nx + ny*W] & FLAGI):
-                    mr.reachable[nx + ny*W]=1; q.append((nx, ny))
-            if mr.maze[cx + cy * W] & FLAGL:
+                if 0<=ny< H and not reachable[nx + ny*W] and not (maze[nx + ny*W] & FLAGI):
+                    reachable[nx + ny*W]=1; q.append((nx, ny))
+            if cell & FLAGL:
                 nx = cx-1; ny = cy
                 if nx<0: nx+=W; ny-=helix
-                if 0<=ny< H and not mr.reachable[nx + ny*W] and not (mr.maze[nx + ny*W] & FLAGI):
-                    mr.reachable[nx + ny*W]=1; q.append((nx, ny))
-            if mr.maze[cx + cy * W] & FLAGU:
+                if 0<=ny< H and not reachable[nx + ny*W] and not (maze[nx + ny*W] & FLAGI):
+                    reachable[nx + ny*W]=1; q.append((nx, ny))
+            if cell & FLAGU:
                 nx=cx; ny=cy+1
-                if 0<=ny< H and not mr.reachable[nx + ny*W] and not (mr.maze[nx + ny*W] & FLAGI):
-                    mr.reachable[nx + ny*W]=1; q.append((nx, ny))
-            if mr.maze[cx + cy * W] & FLAGD:
+                if 0<=ny< H and not reachable[nx + ny*W] and not (maze[nx + ny*W] & FLAGI):
+                    reachable[nx + ny*W]=1; q.append((nx, ny))
+            if cell & FLAGD:
                 nx=cx; ny=cy-1
-                if 0<=ny< H and not mr.reachable[nx + ny*W] and not (mr.maze[nx + ny*W] & FLAGI):
-                    mr.reachable[nx + ny*W]=1; q.append((nx, ny))
+                if 0<=ny< H and not reachable[nx + ny*W] and not (maze[nx + ny*W] & FLAGI):
+                    reachable[nx + ny*W]=1; q.append((nx, ny))
 
     return mr
 
@@ -633,13 +658,36 @@ def build_scad_file(out, inside, part, mazethickness, basethickness, baseheight,
     maze_viz = mr.maze_viz
     solution = mr.solution
     reachable = mr.reachable
+    # exit columns: maxx repeated once per nub around the circumference
+    stride = W // nubs
+    exit_xs = frozenset((mr.maxx + n * stride) % W for n in range(nubs))
+
+    # Lines are collected and written out in one go at the end
+    lines = []
 
     def wprint(s):
-        out.write(s + "\n")
+        lines.append(s)
         # mirror comment lines into comments buffer (strip leading // and optional space)
         if s.startswith("//"):
             appendmazedata(s)
 
+    def border_row(Y):
+        # horizontal walls above display row Y-1 (exit marks on the top border)
+        parts = ["// "]
+        for X in range(W):
+            parts.append("+")
+            if Y == maxY + 1:
+                parts.append(" E " if X in exit_xs else "---")
+            elif Y == minY:
+                parts.append("---")
+            else:
+                if maze_viz[X + (Y-1) * W] & FLAGU:
+                    parts.append("   ")
+                else:
+                    parts.append("---")
+        parts.append("+")
+        return "".join(parts)
+
     # Emit some small SCAD module definitions that the C version writes
     def write_scad_modules():
         # Simple cuttext module (non-textslow version)
@@ -661,34 +709,41 @@ def build_scad_file(out, inside, part, mazethickness, basethickness, baseheight,
 
     wprint(f"// Showing rows {minY} to {maxY} (valid maze area)")
 
+    # Walk the grid once, building the plain and solution views side by side;
+    # they differ only in what fills a valid cell
+    sol_glyph = {ord('S'): " S ", ord('U'): " ↑ ", ord('D'): " ↓ ",
+                 ord('L'): " ← ", ord('R'): " → "}
+    vis_rows = []
+    sol_rows = []
     for Y in range(maxY + 1, minY - 1, -1):
-        line = "// "
         # top border / row
-        for X in range(W):
-            line += "+"
-            if Y == maxY + 1:
-                is_exit = any((X == (mr.maxx + n * (W // nubs)) % W) for n in range(nubs))
-                line += " E " if is_exit else "---"
-            elif Y == minY:
-                line += "---"
-            else:
-                if maze_viz[X + (Y-1) * W] & FLAGU:
-                    line += "   "
-                else:
-                    line += "---"
-        line += "+"
-        wprint(line)
+        border = border_row(Y)
+        vis_rows.append(border)
+        sol_rows.append(border)
         if Y > minY:
-            line = "// "
+            row = (Y - 1) * W
+            left = " " if (maze_viz[W-1 + row] & FLAGR) else "|"
+            vis = ["// ", left]
+            sol = ["// ", left]
             for X in range(W):
-                if X == 0:
-                    line += " " if (maze_viz[W-1 + (Y-1)*W] & FLAGR) else "|"
-                if maze_viz[X + (Y-1)*W] & FLAGI:
-                    line += "###"
+                cell = maze_viz[X + row]
+                if cell & FLAGI:
+                    vis.append("###")
+                    sol.append("###")
                 else:
-                    line += "   "
-                line += " " if (maze_viz[X + (Y-1)*W] & FLAGR) else "|"
-            wprint(line)
+                    vis.append("   ")
+                    glyph = sol_glyph.get(solution[X + row])
+                    if glyph is None:
+                        glyph = "###" if not reachable[X + row] else "   "
+                    sol.append(glyph)
+                wall = " " if (cell & FLAGR) else "|"
+                vis.append(wall)
+                sol.append(wall)
+            vis_rows.append("".join(vis))
+            sol_rows.append("".join(sol))
+
+    for line in vis_rows:
+        wprint(line)
 
     wprint("//")
 
@@ -699,47 +754,8 @@ def build_scad_file(out, inside, part, mazethickness, basethickness, baseheight,
     wprint("// Legend: S = start, arrows (↑↓←→) show path to exit")
     wprint("//")
 
-    for Y in range(maxY + 1, minY - 1, -1):
-        line = "// "
-        for X in range(W):
-            line += "+"
-            if Y == maxY + 1:
-                is_exit = any((X == (mr.maxx + n * (W // nubs)) % W) for n in range(nubs))
-                line += " E " if is_exit else "---"
-            elif Y == minY:
-                line += "---"
-            else:
-                if maze_viz[X + (Y-1) * W] & FLAGU:
-                    line += "   "
-                else:
-                    line += "---"
-        line += "+"
+    for line in sol_rows:
         wprint(line)
-        if Y > minY:
-            line = "// "
-            for X in range(W):
-                if X == 0:
-                    line += " " if (maze_viz[W-1 + (Y-1)*W] & FLAGR) else "|"
-                if maze_viz[X + (Y-1)*W] & FLAGI:
-                    line += "###"
-                else:
-                    sol = solution[X + (Y-1)*W]
-                    if sol == ord('S'):
-                        line += " S "
-                    elif sol == ord('U'):
-                        line += " ↑ "
-                    elif sol == ord('D'):
-                        line += " ↓ "
-                    elif sol == ord('L'):
-                        line += " ← "
-                    elif sol == ord('R'):
-                        line += " → "
-                    elif not reachable[X + (Y-1)*W]:
-                        line += "###"
-                    else:
-                        line += "   "
-                line += " " if (maze_viz[X + (Y-1)*W] & FLAGR) else "|"
-            wprint(line)
 
     wprint("//")
     # Machine-readable
@@ -751,15 +767,15 @@ def build_scad_file(out, inside, part, mazethickness, basethickness, baseheight,
         wprint(row)
     wprint("// MAZE_END")
 
+    lines.append("")
+    out.write("\n".join(lines))
 
-def main(argv):
-    p = argparse.ArgumentParser()
+
+def _register_core(p):
     p.add_argument('--r', type=float, default=20.0)
     p.add_argument('--core-diameter', '--core_diameter', dest='core_diameter', type=float, default=30.0, help='Core diameter (compute r from this like C)')
     p.add_argument('--wall-thickness', '--wallthickness', dest='wallthickness', type=float, default=1.2)
     p.add_argument('--clearance', type=float, default=0.4)
-    p.add_argument('--stl', action='store_true', help='Run output through openscad to make stl (best-effort)')
-    p.add_argument('--resin', action='store_true', help='Half all specified clearances for resin printing')
     p.add_argument('--parts', type=int, default=2, help='Total parts')
     p.add_argument('--part', type=int, default=1)
     p.add_argument('--out', type=str, default=None)
@@ -782,6 +798,20 @@ def main(argv):
     p.add_argument('--horizontal-mirror', dest='horizontal_mirror', action='store_true', help='Mirror maze horizontally (circumferentially)')
     p.add_argument('--maze-margin', '--mazemargin', dest='mazemargin', type=float, default=1.0)
     p.add_argument('--inside', action='store_true')
+    p.add_argument('--core-solid', dest='core_solid', action='store_true')
+    p.add_argument('--core-gap', dest='core_gap', type=float, default=0.0)
+    p.add_argument('--part-thickness', dest='wall_thickness', type=float, default=1.2)
+    p.add_argument('--base-wide', dest='base_wide', action='store_true')
+    p.add_argument('--outer-sides', dest='outer_sides', type=int, default=7)
+    p.add_argument('--outer-round', dest='outer_round', type=float, default=2.0)
+    p.add_argument('--grip-depth', dest='grip_depth', type=float, default=1.5)
+    p.add_argument('--symmetric-cut', dest='symmetric_cut', action='store_true')
+    p.add_argument('--test', dest='test', action='store_true', help='Test pattern instead of maze')
+    p.add_argument('--out-file', dest='out_file', type=str, default=None, help='Output to file (alias)')
+    p.add_argument('--testmaze', action='store_true')
+
+
+def _register_text(p):
     p.add_argument('--text-end', dest='text_end', type=str, default=None)
     p.add_argument('--text-inside', dest='text_inside', type=str, default=None)
     p.add_argument('--text-side', dest='text_side', type=str, default=None)
@@ -790,58 +820,133 @@ def main(argv):
     p.add_argument('--text-slow', action='store_true')
     p.add_argument('--text-side-scale', dest='text_side_scale', type=float, default=100.0)
     p.add_argument('--text-outset', action='store_true')
+    p.add_argument('--text-depth', dest='text_depth', type=float, default=0.5)
+
+
+def _register_logo(p):
     p.add_argument('--logo-depth', dest='logo_depth', type=float, default=0.6)
     p.add_argument('--ajk-logo', action='store_true')
     p.add_argument('--aa-logo', action='store_true')
-    p.add_argument('--core-solid', dest='core_solid', action='store_true')
-    p.add_argument('--core-gap', dest='core_gap', type=float, default=0.0)
-    p.add_argument('--part-thickness', dest='wall_thickness', type=float, default=1.2)
-    p.add_argument('--base-wide', dest='base_wide', action='store_true')
+
+
+def _register_nub(p):
     p.add_argument('--nub-r-clearance', dest='nub_r_clearance', type=float, default=0.1)
     p.add_argument('--nub-z-clearance', dest='nub_z_clearance', type=float, default=0.2)
     p.add_argument('--nub-horizontal', dest='nub_horizontal', type=float, default=1.0)
     p.add_argument('--nub-vertical', dest='nub_vertical', type=float, default=1.0)
     p.add_argument('--nub-normal', dest='nub_normal', type=float, default=1.0)
     p.add_argument('--fix-nubs', dest='fix_nubs', action='store_true')
-    p.add_argument('--outer-sides', dest='outer_sides', type=int, default=7)
-    p.add_argument('--outer-round', dest='outer_round', type=float, default=2.0)
-    p.add_argument('--grip-depth', dest='grip_depth', type=float, default=1.5)
-    p.add_argument('--text-depth', dest='text_depth', type=float, default=0.5)
-    p.add_argument('--symmetric-cut', dest='symmetric_cut', action='store_true')
-    p.add_argument('--test', dest='test', action='store_true', help='Test pattern instead of maze')
+
+
+def _register_resin(p):
+    p.add_argument('--resin', action='store_true', help='Half all specified clearances for resin printing')
+
+
+def _register_stl(p):
+    p.add_argument('--stl', action='store_true', help='Run output through openscad to make stl (best-effort)')
+
+
+def _register_web(p):
     p.add_argument('--mime', dest='mime', action='store_true')
     p.add_argument('--no-a', dest='no_a', action='store_true')
     p.add_argument('--web-form', dest='web_form', action='store_true')
-    p.add_argument('--out-file', dest='out_file', type=str, default=None, help='Output to file (alias)')
-    p.add_argument('--testmaze', action='store_true')
-    args = p.parse_args(argv)
 
+
+# Rarely-used option groups are only added to the parser when argv names one
+# of their options (or a prefix of one, as argparse accepts abbreviations).
+# Unregistered options are simply absent from args, hence the getattr()s.
+_LAZY_GROUPS = (
+    (('--text-end', '--text-inside', '--text-side', '--text-font', '--text-font-end', '--text-slow', '--text-side-scale', '--text-outset', '--text-depth'), _register_text),
+    (('--logo-depth', '--ajk-logo', '--aa-logo'), _register_logo),
+    (('--nub-r-clearance', '--nub-z-clearance', '--nub-horizontal', '--nub-vertical', '--nub-normal', '--fix-nubs'), _register_nub),
+    (('--resin',), _register_resin),
+    (('--stl',), _register_stl),
+    (('--mime', '--no-a', '--web-form'), _register_web),
+)
+
+
+def _build_parser(argv):
+    p = argparse.ArgumentParser()
+    _register_core(p)
+    given = [a.split('=', 1)[0] for a in argv if a.startswith('--')]
+    want_all = '-h' in argv or any('--help'.startswith(a) for a in given if len(a) > 2)
+    for names, register in _LAZY_GROUPS:
+        if want_all or any(n.startswith(a) for a in given for n in names):
+            register(p)
+    return p
+
+
+@functools.lru_cache(maxsize=64)
+def _parse(argv):
+    """Parse an argv tuple; cached for callers that run main() in a loop.
+    The returned Namespace is shared, so treat it as read-only."""
+    return _build_parser(argv).parse_args(argv)
+
+
+@functools.lru_cache(maxsize=None)
+def _openscad():
+    """Path to openscad, looked up on PATH once per process (the bare name if
+    missing, so running it reports FileNotFoundError as before)."""
+    import shutil
+    return shutil.which('openscad') or 'openscad'
+
+
+@functools.lru_cache(maxsize=None)
+def _defaults():
+    """Default value of every option (all groups), keyed by dest."""
+    p = argparse.ArgumentParser()
+    _register_core(p)
+    for _, register in _LAZY_GROUPS:
+        register(p)
+    return vars(p.parse_args([]))
+
+
+@functools.lru_cache(maxsize=64)
+def _geometry(part, parts, inside, core_diameter, r, wallthickness, mazethickness,
+              clearance, coresolid, coregap, coreheight, basethickness, basegap, baseheight):
+    """Return (radius to generate the maze at, part height), following C's
+    r0/r1 and height computations (same float operation order)."""
+    # Mimic C's r0/r1 computation so we pass the same radius into makemaze
+    if core_diameter is not None:
+        r1 = core_diameter / 2.0 + wallthickness + (part - 1) * (wallthickness + mazethickness + clearance)
+    else:
+        r1 = r
+    if inside:
+        # r0 is inner
+        r = r1 - wallthickness
+    else:
+        # maze outside on all but the last part: outer radius includes it
+        r = r1 + mazethickness if part < parts else r1
+    height = ((coregap + baseheight) if coresolid else 0.0) + (
+        coreheight + basethickness + (basethickness + basegap) * (part - 1))
+    if part == 1:
+        height -= (coreheight if coresolid else coregap)
+    elif part > 1:
+        height -= baseheight
+    return r, height
+
+
+def main(argv):
+    # _run() adjusts some options in place (resin, out-file), so pass a copy
+    _run(argparse.Namespace(**vars(_parse(tuple(argv)))))
+
+
+def main_from_dict(params):
+    """Run with already-validated options given as {dest: value}, without
+    going through argv parsing (e.g. for the web form)."""
+    defaults = _defaults()
+    unknown = set(params) - set(defaults)
+    if unknown:
+        raise ValueError('Unknown option(s): ' + ', '.join(sorted(unknown)))
+    _run(argparse.Namespace(**{**defaults, **params}))
+
+
+def _run(args):
     # parameters (mapped from CLI)
     # determine basic params
     part = args.part
     mazethickness = args.mazethickness
     inside = args.inside
-    # Mimic C's r0/r1 computation so we pass the same radius into makemaze
-    if args.core_diameter is not None:
-        r1 = args.core_diameter / 2.0 + args.wallthickness + (part - 1) * (args.wallthickness + mazethickness + args.clearance)
-    else:
-        r1 = args.r
-    # r0 is inner
-    r0 = r1 - args.wallthickness
-    # mazeinside/mazeoutside like C defaults
-    mazeinside = inside
-    mazeoutside = not inside
-    if part == 1:
-        mazeinside = False
-    if part == args.part:  # keep parity with C; parts default 2 so leave mazeoutside unless part==parts
-        pass
-    # if mazeoutside and part < parts then outside radius includes mazethickness
-    parts_total = args.parts if hasattr(args, 'parts') else 2
-    if mazeoutside and part < parts_total:
-        r1 += mazethickness
-    # choose radius to generate maze at
-    r = r0 if inside else r1
-    mazethickness = args.mazethickness
     basethickness = args.basethickness
     baseheight = args.baseheight
     basegap = args.basegap
@@ -859,12 +964,9 @@ def main(argv):
     coresolid = 1 if getattr(args, 'core_solid', False) else 0
     coregap = getattr(args, 'core_gap', 0.0)
     coreheight = args.core_height if hasattr(args, 'core_height') else 0.0
-    height = (coregap + baseheight) if coresolid else 0.0
-    height += coreheight + basethickness + (basethickness + basegap) * (part - 1)
-    if part == 1:
-        height -= (coreheight if coresolid else coregap)
-    if part > 1:
-        height -= baseheight
+    r, height = _geometry(part, getattr(args, 'parts', 2), inside, args.core_diameter, args.r,
+                          args.wallthickness, mazethickness, args.clearance, coresolid, coregap,
+                          coreheight, basethickness, basegap, baseheight)
     coreheight = args.core_height if hasattr(args, 'core_height') else 0
     if args.seed is not None:
         random.seed(args.seed)
@@ -899,6 +1001,10 @@ def main(argv):
 
     # Output: either SCAD or STL conversion via OpenSCAD
     if getattr(args, 'stl', False):
+        # only the STL path needs these; keep them off the SCAD-only startup
+        import shutil
+        import subprocess
+        import tempfile
         # Write SCAD to a temporary file
         fd, scad_path = tempfile.mkstemp(suffix='.scad')
         os.close(fd)
@@ -914,7 +1020,7 @@ def main(argv):
                 os.close(fd2)
             # Run openscad to convert
             try:
-                res = subprocess.run(['openscad', '-q', scad_path, '-o', out_stl], check=False)
+                res = subprocess.run([_openscad(), '-q', scad_path, '-o', out_stl], check=False)
             except FileNotFoundError:
                 os.remove(scad_path)
                 if not args.out and os.path.exists(out_stl):
@@ -931,22 +1037,18 @@ def main(argv):
             # If no explicit outfile, stream STL to stdout
             if not args.out:
                 with open(out_stl, 'rb') as sf:
-                    sys.stdout.buffer.write(sf.read())
+                    shutil.copyfileobj(sf, sys.stdout.buffer, 1 << 20)
                 os.remove(out_stl)
             else:
                 # Write metadata if we have collected comments_buffer
                 if comments_buffer:
                     try:
                         meta_path = args.out + '.meta'
-                        with open(meta_path, 'w', encoding='utf-8') as mf:
-                            mf.write('Puzzlebox Metadata\n')
-                            mf.write('==================\n\n')
-                            mf.write('Generated by: puzzlebox (Python port)\n')
-                            mf.write('\n')
-                            for line in comments_buffer:
-                                mf.write(line)
-                                if not line.endswith('\n'):
-                                    mf.write('\n')
+                        with open(meta_path, 'wb') as mf:
+                            mf.write(b'Puzzlebox Metadata\n'
+                                     b'==================\n\n'
+                                     b'Generated by: puzzlebox (Python port)\n'
+                                     b'\n' + comments_buffer)
                     except Exception:
                         pass
         except Exception as e:
@@ -963,11 +1065,8 @@ def main(argv):
 
     # optionally write collected comments (for STL-comments or comparison files)
     if args.comments:
-        with open(args.comments, 'w', encoding='utf-8') as cf:
-            for line in comments_buffer:
-                cf.write(line)
-                if not line.endswith('\n'):
-                    cf.write('\n')
+        with open(args.comments, 'wb') as cf:
+            cf.write(comments_buffer)
 
 
 if __name__ == '__main__':
@@ -38,6 +38,80 @@
 #define	SCALEI "0.001"
 #define	scaled(x)	((long long)round((x)*SCALE))
 
+/**
+ * Batch server mode, selected by "--server" as the first argument.
+ * Reads one job per line from stdin, each line being extra command line options
+ * for that job (e.g. "--part 2 --out-file maze.scad"), appended to any options
+ * that followed --server. Each job runs in a forked child, which returns from
+ * here with the combined arguments and carries on through main() as normal;
+ * the parent waits for it and writes an ack line ("OK" or "FAIL") to stdout.
+ * A successful job writing to --out-file is acked as "OK <bytes>", giving the
+ * size of the file, which the child reports back over a pipe.
+ * This saves the exec and start up cost of a new process per job.
+ *
+ * @param argc Number of command line arguments
+ * @param argvp Pointer to the command line arguments, replaced in the child
+ * @return New argc, in the child only (the parent exits at end of input)
+ */
+static int server_fd = -1;      // In a server job, where to report the output size
+
+static int
+server (int argc, const char ***argvp)
+{
+   const char **argv = *argvp;
+   char *line = NULL;
+   size_t len = 0;
+   ssize_t l;
+   setvbuf (stdout, NULL, _IOLBF, 0);
+   while ((l = getline (&line, &len, stdin)) >= 0)
+   {
+      const char **args = malloc (sizeof (*args) * (argc + l / 2 + 2));
+      if (!args)
+         errx (1, "malloc");
+      int n = 0;
+      args[n++] = argv[0];
+      for (int a = 2; a < argc; a++)
+         args[n++] = argv[a];
+      for (char *p = strtok (line, " \t\r\n"); p; p = strtok (NULL, " \t\r\n"))
+         args[n++] = p;
+      args[n] = NULL;
+      if (n == argc - 1)
+      {                         // Blank line
+         free (args);
+         continue;
+      }
+      int fds[2];
+      if (pipe (fds))
+         err (1, "bad pipe");
+      pid_t pid = fork ();
+      if (pid < 0)
+         err (1, "bad fork");
+      if (!pid)
+      {                         // Child, stdout is reserved for acks
+         dup2 (STDERR_FILENO, STDOUT_FILENO);
+         close (fds[0]);
+         fcntl (fds[1], F_SETFD, FD_CLOEXEC);
+         server_fd = fds[1];
+         *argvp = args;
+         return n;
+      }
+      free (args);
+      close (fds[1]);
+      char size[32];
+      ssize_t s = read (fds[0], size, sizeof (size) - 1);
+      close (fds[0]);
+      size[s > 0 ? s : 0] = 0;
+      int status = 0;
+      waitpid (pid, &status, 0);
+      if (WIFEXITED (status) && !WEXITSTATUS (status))
+         printf (*size ? "OK %s\n" : "OK\n", size);
+      else
+         printf ("FAIL\n");
+   }
+   free (line);
+   exit (0);
+}
+
 /**
  * Main entry point for the puzzle box generator.
  * Parses command line arguments, validates parameters, generates OpenSCAD code
@@ -50,6 +124,9 @@
 int
 main (int argc, const char *argv[])
 {
+   if (argc > 1 && !strcmp (argv[1], "--server"))
+      argc = server (argc, &argv);
+
    double basethickness = 1.6;
    double basegap = 0.4;
    double baseheight = 10;
@@ -2767,8 +2844,13 @@ main (int argc, const char *argv[])
          box (part);
    fprintf (out, "}\n");
    close (f);
+   long long outsize = -1;      // Size of --out-file, for the server ack
    if (out != stdout)
+   {
+      if (!stl)
+         outsize = ftell (out);
       fclose (out);
+   }
 
    if (stl)
    {
@@ -2798,6 +2880,9 @@ main (int argc, const char *argv[])
          unlink (tmp2);
          errx (1, "openscad failed");
       }
+      struct stat st;
+      if (outfile && !stat (outfile, &st))
+         outsize = st.st_size;
       if (!outfile)
       {                         // To stdout
          int i = open (tmp2, O_RDONLY);
@@ -2880,5 +2965,7 @@ main (int argc, const char *argv[])
    }
    if (mazedata)
       free (mazedata);
+   if (server_fd >= 0 && outsize >= 0)
+      dprintf (server_fd, "%lld", outsize);
    return 0;
 }
@@ -15,36 +15,42 @@ Output:
 """
 
 import ast
+import json
 import sys
 import argparse
 from typing import List, Tuple
 
-# Default points taken from the user's polyhedron (embedded for convenience)
-POINTS = [
-    [-584,11886,9250],[-682,13883,9250],[-1746,11771,9250],[-2113,14244,9250],[-2891,11543,9250],[-3499,13968,9250],[-4009,11204,9250],[-4683,13087,9250],
-    [-584,11886,10500],[-682,13883,10500],[-1746,11771,10500],[-2113,14244,10500],[-2891,11543,10500],[-3499,13968,10500],[-4009,11204,10500],[-4683,13087,10500],
-    [-584,11886,11750],[-682,13883,11750],[-1746,11771,11750],[-2113,14244,11750],[-2891,11543,11750],[-3499,13968,11750],[-4009,11204,11750],[-4683,13087,11750],
-    [-584,11886,13000],[-682,13883,13000],[-1746,11771,13000],[-2113,14244,13000],[-2891,11543,13000],[-3499,13968,13000],[-4009,11204,13000],[-4683,13087,13000],
-    [584,-11886,9250],[682,-13883,9250],[1746,-11771,9250],[2113,-14244,9250],[2891,-11543,9250],[3499,-13968,9250],[4009,-11204,9250],[4683,-13087,9250],
-    [584,-11886,10500],[682,-13883,10500],[1746,-11771,10500],[2113,-14244,10500],[2891,-11543,10500],[3499,-13968,10500],[4009,-11204,10500],[4683,-13087,10500],
-    [584,-11886,11750],[682,-13883,11750],[1746,-11771,11750],[2113,-14244,11750],[2891,-11543,11750],[3499,-13968,11750],[4009,-11204,11750],[4683,-13087,11750],
-    [584,-11886,13000],[682,-13883,13000],[1746,-11771,13000],[2113,-14244,13000],[2891,-11543,13000],[3499,-13968,13000],[4009,-11204,13000],[4683,-13087,13000],
-]
+# Default points taken from the user's polyhedron (embedded for convenience).
+# A tuple of int tuples is a single compile-time constant: nothing to build
+# at import, and smaller than nested lists.
+POINTS = (
+    (-584,11886,9250),(-682,13883,9250),(-1746,11771,9250),(-2113,14244,9250),(-2891,11543,9250),(-3499,13968,9250),(-4009,11204,9250),(-4683,13087,9250),
+    (-584,11886,10500),(-682,13883,10500),(-1746,11771,10500),(-2113,14244,10500),(-2891,11543,10500),(-3499,13968,10500),(-4009,11204,10500),(-4683,13087,10500),
+    (-584,11886,11750),(-682,13883,11750),(-1746,11771,11750),(-2113,14244,11750),(-2891,11543,11750),(-3499,13968,11750),(-4009,11204,11750),(-4683,13087,11750),
+    (-584,11886,13000),(-682,13883,13000),(-1746,11771,13000),(-2113,14244,13000),(-2891,11543,13000),(-3499,13968,13000),(-4009,11204,13000),(-4683,13087,13000),
+    (584,-11886,9250),(682,-13883,9250),(1746,-11771,9250),(2113,-14244,9250),(2891,-11543,9250),(3499,-13968,9250),(4009,-11204,9250),(4683,-13087,9250),
+    (584,-11886,10500),(682,-13883,10500),(1746,-11771,10500),(2113,-14244,10500),(2891,-11543,10500),(3499,-13968,10500),(4009,-11204,10500),(4683,-13087,10500),
+    (584,-11886,11750),(682,-13883,11750),(1746,-11771,11750),(2113,-14244,11750),(2891,-11543,11750),(3499,-13968,11750),(4009,-11204,11750),(4683,-13087,11750),
+    (584,-11886,13000),(682,-13883,13000),(1746,-11771,13000),(2113,-14244,13000),(2891,-11543,13000),(3499,-13968,13000),(4009,-11204,13000),(4683,-13087,13000),
+)
+
+
+# Deletes every character a plain JSON list of numbers can contain
+_NUMERIC_LIST_CHARS = str.maketrans('', '', '[],0123456789.+-eE \t\r\n')
 
 
 def compute_bounding_box(points: List[List[float]]) -> Tuple[Tuple[float,float,float], Tuple[float,float,float]]:
-    xs = [p[0] for p in points]
-    ys = [p[1] for p in points]
-    zs = [p[2] for p in points]
-    minpt = (min(xs), min(ys), min(zs))
-    maxpt = (max(xs), max(ys), max(zs))
+    # Transpose once to x/y/z columns; min/max then run over each in C
+    cols = tuple(zip(*points))
+    minpt = tuple(map(min, cols))
+    maxpt = tuple(map(max, cols))
     return minpt, maxpt
 
 def dimensions(minpt: Tuple[float,float,float], maxpt: Tuple[float,float,float]) -> Tuple[float,float,float]:
-    return (maxpt[0] - minpt[0], maxpt[1] - minpt[1], maxpt[2] - minpt[2])
+    return tuple(hi - lo for lo, hi in zip(minpt, maxpt))
 
 def center(minpt: Tuple[float,float,float], maxpt: Tuple[float,float,float]) -> Tuple[float,float,float]:
-    return ((minpt[0] + maxpt[0]) / 2.0, (minpt[1] + maxpt[1]) / 2.0, (minpt[2] + maxpt[2]) / 2.0)
+    return tuple((lo + hi) / 2.0 for lo, hi in zip(minpt, maxpt))
 
 def extract_points_from_scad(text: str) -> List[List[float]]:
     """
@@ -60,25 +66,34 @@ def extract_points_from_scad(text: str) -> List[List[float]]:
     bracket_idx = text.find('[', pts_idx)
     if bracket_idx == -1:
         raise ValueError("No '[' after points=")
-    # Find matching closing bracket for the points list
+    # Find matching closing bracket for the points list, jumping between
+    # brackets with str.find rather than stepping through every character
+    depth = 1
     i = bracket_idx
-    depth = 0
-    while i < len(text):
-        if text[i] == '[':
+    next_open = text.find('[', i + 1)
+    while depth:
+        i = text.find(']', i + 1)
+        if i == -1:
+            raise ValueError("Unbalanced brackets while parsing points list")
+        # count the opens passed on the way to this close
+        while next_open != -1 and next_open < i:
             depth += 1
-        elif text[i] == ']':
-            depth -= 1
-            if depth == 0:
-                # slice from bracket_idx to i (inclusive)
-                pts_text = text[bracket_idx:i+1]
-                # Use ast.literal_eval to safely parse into Python list
-                try:
-                    pts = ast.literal_eval(pts_text)
-                except Exception as e:
-                    raise ValueError(f"Failed to parse points list: {e}")
-                return pts
-        i += 1
-    raise ValueError("Unbalanced brackets while parsing points list")
+            next_open = text.find('[', next_open + 1)
+        depth -= 1
+    # slice from bracket_idx to i (inclusive)
+    pts_text = text[bracket_idx:i+1]
+    # Plain numeric lists are valid JSON, which parses much faster; anything
+    # else (trailing commas, '.5', ...) goes through ast.literal_eval
+    if not pts_text.translate(_NUMERIC_LIST_CHARS):
+        try:
+            return json.loads(pts_text)
+        except ValueError:
+            pass
+    try:
+        pts = ast.literal_eval(pts_text)
+    except Exception as e:
+        raise ValueError(f"Failed to parse points list: {e}")
+    return pts
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze OpenSCAD polyhedron points for bounding box/dimensions.")
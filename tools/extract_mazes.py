@@ -10,29 +10,39 @@ files containing the relative path and the maze text.
 from __future__ import annotations
 import argparse
 import os
+import pickle
 import re
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, repeat
 from typing import List, Tuple
 
+_PART_RE = re.compile(r'//\s*Part\s*(\d+)\b')
+_MAZE_RE = re.compile(r'MAZE\s+WITH\s+SOLUTION', re.I)
+_NUMERIC_RE = re.compile(r'^[\s\[\]\d,;()\-]+$')
+
+CACHE_NAME = '.extract_cache.pkl'
+
 
 def extract_blocks(lines: List[str]) -> List[Tuple[int, int, str]]:
     """Return list of (start_idx, end_idx, block_text) for consecutive comment blocks."""
     blocks = []
-    i = 0
-    n = len(lines)
-    while i < n:
-        if lines[i].lstrip().startswith('//'):
-            start = i
-            while i < n and lines[i].lstrip().startswith('//'):
-                i += 1
-            end = i
-            block = ''.join(lines[start:end])
-            blocks.append((start, end, block))
-        else:
-            i += 1
+    comment_idx = [i for i, l in enumerate(lines) if l.lstrip().startswith('//')]
+    # consecutive indices share the same (index - position) key
+    for _, run in groupby(enumerate(comment_idx), key=lambda t: t[1] - t[0]):
+        run = list(run)
+        start = run[0][1]
+        end = run[-1][1] + 1
+        blocks.append((start, end, ''.join(lines[start:end])))
     return blocks
 
 
+# The comparison script further down redefines extract_blocks(); keep a
+# handle on this one for extract_from_file, which pool workers call after
+# importing the whole module.
+_extract_comment_blocks = extract_blocks
+
+
 def find_part_for_block(lines: List[str], start_idx: int, block_text: str) -> int:
     """Determine the part number for a block.
 
@@ -40,12 +50,12 @@ def find_part_for_block(lines: List[str], start_idx: int, block_text: str) -> in
     scan backwards from start_idx-1 to find the nearest marker. If none
     is found, return 0.
     """
-    m = re.search(r'//\s*Part\s*(\d+)\b', block_text)
+    m = _PART_RE.search(block_text)
     if m:
         return int(m.group(1))
     j = start_idx - 1
     while j >= 0:
-        m2 = re.search(r'//\s*Part\s*(\d+)\b', lines[j])
+        m2 = _PART_RE.search(lines[j])
         if m2:
             return int(m2.group(1))
         j -= 1
@@ -67,37 +77,75 @@ def clean_comment_block(block_text: str) -> str:
     return '\n'.join(cleaned_lines).strip('\n')
 
 
+def _iter_scad(root: str):
+    """Yield .scad paths under root in os.walk order (files, then subdirs),
+    using the type info scandir already has instead of extra stat calls."""
+    subdirs = []
+    try:
+        with os.scandir(root) as it:
+            for e in it:
+                try:
+                    is_dir = e.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # like os.walk(followlinks=False): don't descend symlinks
+                    if not e.is_symlink():
+                        subdirs.append(e.path)
+                elif e.name.lower().endswith('.scad'):
+                    yield e.path
+    except OSError:
+        return
+    for d in subdirs:
+        yield from _iter_scad(d)
+
+
 def extract_from_file(path: str, cwd: str) -> List[Tuple[int, str, str]]:
     """Return list of tuples (part, relpath, maze_text) found in file."""
     with open(path, 'r', encoding='utf-8', errors='replace') as fh:
         lines = fh.readlines()
     results = []
-    blocks = extract_blocks(lines)
+    blocks = _extract_comment_blocks(lines)
     for start, end, block in blocks:
-        if not re.search(r'MAZE\s+WITH\s+SOLUTION', block, re.I):
+        # cheap reject first; no other character folds to these letters
+        if 'maze' not in block.lower() or not _MAZE_RE.search(block):
             continue
         part = find_part_for_block(lines, start, block)
         maze = clean_comment_block(block)
         maze_lines = maze.splitlines()
+        # Find all three markers in one pass. The machine-readable one is
+        # looked up after the cut below, so if its first hit falls inside the
+        # cut the first one from 'MAZE WITH SOLUTION' on is used instead.
+        viz_idx = sol_idx = mr_idx = mr_after_sol = None
+        # lowercase the block in one call; lower() never adds or removes
+        # line breaks, so these line up with maze_lines
+        for i, low in enumerate(maze.lower().splitlines()):
+            if viz_idx is None and 'maze visualization' in low:
+                viz_idx = i
+            if sol_idx is None and 'maze with solution' in low:
+                sol_idx = i
+            if 'machine-readable maze data:' in low:
+                if mr_idx is None:
+                    mr_idx = i
+                if sol_idx is not None:
+                    mr_after_sol = i
+                    break
+        cut = viz_idx is not None and sol_idx is not None and viz_idx < sol_idx
+
         # Remove region between 'MAZE VISUALIZATION' and 'MAZE WITH SOLUTION'
-        try:
-            viz_idx = next((i for i, l in enumerate(maze_lines) if 'maze visualization' in l.lower()), None)
-        except StopIteration:
-            viz_idx = None
-        try:
-            sol_idx = next((i for i, l in enumerate(maze_lines) if 'maze with solution' in l.lower()), None)
-        except StopIteration:
-            sol_idx = None
-        if viz_idx is not None and sol_idx is not None and viz_idx < sol_idx:
+        if cut:
             del maze_lines[viz_idx:sol_idx]
+            if mr_idx is not None and mr_idx >= viz_idx:
+                mr_idx = mr_after_sol
+                if mr_idx is not None:
+                    mr_idx -= sol_idx - viz_idx
 
         # Truncate everything after 'Machine-readable maze data:' (exclusive)
-        mr_idx = next((i for i, l in enumerate(maze_lines) if 'machine-readable maze data:' in l.lower()), None)
         if mr_idx is not None:
             maze_lines = maze_lines[:mr_idx]
 
         # Remove numeric-only lines (likely raw maze data arrays)
-        filtered_lines = [l for l in maze_lines if not re.match(r'^[\s\[\]\d,;()\-]+$', l)]
+        filtered_lines = [l for l in maze_lines if not _NUMERIC_RE.match(l)]
         maze_filtered = '\n'.join(filtered_lines).strip()
         if not maze_filtered:
             continue
@@ -106,6 +154,14 @@ def extract_from_file(path: str, cwd: str) -> List[Tuple[int, str, str]]:
     return results
 
 
+def _extract_parts(path: str, cwd: str):
+    """Pool worker for main(): ([(part, maze)], None), or (None, error)."""
+    try:
+        return [(part, maze) for part, _, maze in extract_from_file(path, cwd)], None
+    except Exception as e:
+        return None, e
+
+
 def main(argv=None) -> int:
     p = argparse.ArgumentParser(description='Extract mazes with solutions from .scad files')
     p.add_argument('--input', '-i', default='output', help='Input directory to scan (default: output)')
@@ -118,24 +174,57 @@ def main(argv=None) -> int:
 
     parts = defaultdict(list)  # part -> list of (relpath, maze)
 
-    for root, _, files in os.walk(input_dir):
-        for fname in files:
-            if not fname.lower().endswith('.scad'):
-                continue
-            path = os.path.join(root, fname)
-            try:
-                found = extract_from_file(path, cwd)
-            except Exception as e:
-                print(f'Warning: failed to read {path}: {e}')
+    # Results from earlier runs: abspath -> (mtime_ns, size, [(part, maze)]).
+    # Only files seen in this run are carried over, so deleted ones drop out.
+    cache_path = os.path.join(out_dir, CACHE_NAME)
+    try:
+        with open(cache_path, 'rb') as fh:
+            old_cache = pickle.load(fh)
+    except Exception:
+        old_cache = {}
+    cache = {}
+
+    entries = []  # (path, cache key, stat, cached result or None)
+    todo = []
+    for path in _iter_scad(input_dir):
+        key = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            print(f'Warning: failed to read {path}: {e}')
+            continue
+        hit = old_cache.get(key)
+        found = hit[2] if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size else None
+        if found is None:
+            todo.append(path)
+        entries.append((path, key, st, found))
+
+    # Parse the new and changed files across processes
+    fresh = {}
+    if len(todo) > 1:
+        with ProcessPoolExecutor() as ex:
+            fresh = dict(zip(todo, ex.map(_extract_parts, todo, repeat(cwd), chunksize=16)))
+    elif todo:
+        fresh = {todo[0]: _extract_parts(todo[0], cwd)}
+
+    for path, key, st, found in entries:
+        if found is None:
+            found, err = fresh[path]
+            if err is not None:
+                print(f'Warning: failed to read {path}: {err}')
                 continue
-            for part, rel, maze in found:
-                parts[part].append((rel, maze))
+        cache[key] = (st.st_mtime_ns, st.st_size, found)
+        rel = os.path.relpath(path, cwd)
+        for part, maze in found:
+            parts[part].append((rel, maze))
 
     if not parts:
         print('No mazes with solutions found.')
         return 0
 
     os.makedirs(out_dir, exist_ok=True)
+    with open(cache_path, 'wb') as fh:
+        pickle.dump(cache, fh, pickle.HIGHEST_PROTOCOL)
     for part in sorted(parts.keys()):
         fname = os.path.join(out_dir, f'part_{part}_mazes.txt')
         with open(fname, 'w', encoding='utf-8') as out:
@@ -164,41 +253,39 @@ import sys
 
 
 def find_scad_files(root):
-    for dirpath, dirs, files in os.walk(root):
-        for fn in files:
-            if fn.lower().endswith('.scad'):
-                yield os.path.join(dirpath, fn)
+    yield from _iter_scad(root)
 
 
 def extract_blocks(path):
     blocks = []
+    # Scan raw bytes; only the extracted blocks get decoded
     try:
-        with open(path, 'r', encoding='utf-8', errors='replace') as f:
-            lines = f.readlines()
+        with open(path, 'rb') as f:
+            lines = f.read().splitlines()
     except Exception:
         return blocks
 
     i = 0
     while i < len(lines):
         line = lines[i]
-        if 'MAZE WITH SOLUTION' in line.upper():
+        if b'MAZE WITH SOLUTION' in line.upper():
             # collect following consecutive comment lines (// ...)
             i += 1
             block_lines = []
             while i < len(lines):
                 l = lines[i]
                 stripped = l.lstrip()
-                if stripped.startswith('//'):
+                if stripped.startswith(b'//'):
                     # drop leading // and one optional space
                     content = stripped[2:]
-                    if content.startswith(' '):
+                    if content.startswith(b' '):
                         content = content[1:]
-                    block_lines.append(content.rstrip('\n'))
+                    block_lines.append(content)
                     i += 1
                     continue
                 # stop on any non-comment line
                 break
-            blocks.append('\n'.join(block_lines).rstrip())
+            blocks.append(b'\n'.join(block_lines).decode('utf-8', 'replace').rstrip())
         else:
             i += 1
     return blocks
@@ -213,27 +300,30 @@ def main():
     outdir = args.outdir
     os.makedirs(outdir, exist_ok=True)
 
-    # prepare output files (overwrite)
+    # prepare output files (overwrite); kept open for the whole scan
     part_files = []
-    for n in range(1, 6):
-        p = os.path.join(outdir, f'part{n}-maze-comparison.txt')
-        part_files.append(p)
-        with open(p, 'w', encoding='utf-8') as f:
+    try:
+        for n in range(1, 6):
+            p = os.path.join(outdir, f'part{n}-maze-comparison.txt')
+            f = open(p, 'w', encoding='utf-8')
+            part_files.append(f)
             f.write(f'Part {n} maze comparison file. Extracted MAZE WITH SOLUTION blocks.\n\n')
 
-    counts = [0]*5
+        counts = [0]*5
 
-    scad_count = 0
-    for scad in find_scad_files(args.root):
-        scad_count += 1
-        blocks = extract_blocks(scad)
-        for idx, block in enumerate(blocks[:5]):
-            outpath = part_files[idx]
-            counts[idx] += 1
-            with open(outpath, 'a', encoding='utf-8') as f:
+        scad_count = 0
+        for scad in find_scad_files(args.root):
+            scad_count += 1
+            blocks = extract_blocks(scad)
+            for idx, block in enumerate(blocks[:5]):
+                counts[idx] += 1
+                f = part_files[idx]
                 f.write('File: ' + scad + '\n')
                 f.write(block + '\n')
                 f.write('\n' + ('-'*72) + '\n\n')
+    finally:
+        for f in part_files:
+            f.close()
 
     # summary
     print(f'Searched root: {args.root}')
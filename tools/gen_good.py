@@ -1,112 +1,226 @@
 #!/usr/bin/env python3
 
-import sys,os,os.path
-import argparse,tempfile,itertools,subprocess,json,datetime
+import sys,os,os.path,heapq,atexit
+import argparse,itertools,subprocess,json,datetime,concurrent.futures
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import parse_maze_comments as analyze
 
 
+# Options shared by every candidate, as argv strings; --parts, the
+# complexity, the caller's options and --part follow per gen_maze call.
+DEFAULT_ARGS = tuple(map(str, [
+    '--core-diameter',  15,   # size of empty space in smallest
+    '--core-height',  85,     # height of the innermost piece
+    '--nubs',  2,             # count of nubs (2,3)
+    '--base-height',  8,      # "base height" (mm); the height of the base of the part
+
+    '--clearance',  0.4,      # clearance between parts, radius (default, 0.4)
+
+    '--nub-horizontal',  1.0, # scale the size of the nubs
+    '--nub-vertical',    1.0,
+    '--nub-normal',      1.0,
+
+    '--helix',  0,            # non-helical (no slope to maze path?)
+    '--part-thickness',  2,   # wall thickness (mm) (wall of the cylinder, not the maze)
+    '--park-thickness',  0.7, # thickness of park ridge to click closed (mm)
+    '--maze-thickness',  2,   # maze thickness (mm); the height of the maze walls
+    '--maze-complexity',  7, # [-10, +10]
+    '--maze-step',  5,        # maze spacing (mm); the (centerline) distance between one cell and the next
+    '--maze-margin',  1,      # maze top margin (mm)
+    '--outer-sides',  0,      # side count (0: round)
+
+    '--fix-nubs',
+]))
+
+PUZZLEBOX_EXE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),'../puzzlebox'))
+
+
 class Leaderboard:
+    # Min-heap of the best keep_count entries as (score, seq, data); seq
+    # breaks ties (later wins, as before) so data is never compared.
     def __init__(self, keep: int):
         self.keep_count = keep
-        self.keep = []
+        self._heap = []
+        self._seq = itertools.count()
 
     def add( self, score, *data ):
-        self.keep.append((score,data))
-        self.keep.sort(reverse=True)
-        if len(self.keep) > self.keep_count:
-            self.keep = self.keep[:self.keep_count]
+        item = (score,next(self._seq),data)
+        if len(self._heap) < self.keep_count:
+            heapq.heappush(self._heap,item)
+        else:
+            heapq.heappushpop(self._heap,item)
 
+    # Lowest score kept once the board is full (None until then); a
+    # candidate below it is dropped as soon as it is added.
+    @property
+    def floor(self):
+        if len(self._heap) < self.keep_count or not self._heap:
+            return None
+        return self._heap[0][0]
 
-def emit(*args,**kwargs):
-    if len(args) > 1:
-        msg = args[0].format(*(args[1:]))
-    else:
-        msg = args[0]
+    @property
+    def keep(self):
+        return [ (score,data) for score,_,data in sorted(self._heap,reverse=True) ]
+
+
+# gen_good.log, opened on first use and kept for the life of the process.
+# Line-buffered, so each message still reaches the file as it is emitted.
+_LOG = None
+
+def _get_log():
+    global _LOG
+    if _LOG is None:
+        _LOG = open('gen_good.log','at',encoding='utf-8',buffering=1)
+        atexit.register(_LOG.close)
+    return _LOG
 
+
+# stdout is flushed by emit_flush() at the end of each leader and STL
+# rather than after every message (gen_good.log stays line-buffered).
+def emit(msg,**kwargs):
     print(msg,**kwargs)
-    sys.stdout.flush()
 
     log_kwargs = kwargs.copy()
-    try:
-        log_kwargs.pop('file')
-    except KeyError:
-        pass
+    log_kwargs.pop('file',None)
 
-    with open('gen_good.log','at',encoding='utf-8') as _log:
-        print(msg,**log_kwargs,file=_log)
-        
+    print(msg,**log_kwargs,file=_get_log())
+
+
+def emit_fmt(fmt,*args,**kwargs):
+    emit(fmt.format(*args),**kwargs)
 
-def gen_maze( puzzlebox_args, part=1, count=100, keep=3, parts=6, leaders=None ):
-    if leaders is None:
-        leaders = Leaderboard(keep=keep)
 
-    default_args = [
-        '--parts',  parts,            # 6 parts, 5 mazes
-        '--core-diameter',  15,   # size of empty space in smallest
-        '--core-height',  85,     # height of the innermost piece
-        '--nubs',  2,             # count of nubs (2,3)
-        '--base-height',  8,      # "base height" (mm); the height of the base of the part
+def emit_flush():
+    sys.stdout.flush()
         
-        '--clearance',  0.4,      # clearance between parts, radius (default, 0.4)
 
-        '--nub-horizontal',  1.0, # scale the size of the nubs
-        '--nub-vertical',    1.0,
-        '--nub-normal',      1.0,
+def _gen_one( i, command, part, parts, score_maze, floor=None ):
+    """Generate one candidate; returns (score, i, maze, metrics, scad), or
+    None if it could not be scored.  A maze scoring below `floor` can't
+    place, so only its score comes back (maze and scad are None)."""
+    # Without --out-file puzzlebox writes the SCAD to stdout; take it from
+    # the pipe rather than a temp file. close_fds=False (with an absolute
+    # path) lets Popen use posix_spawn instead of fork+exec; our own fds are
+    # non-inheritable, so nothing extra leaks into the child.
+    #print(f'Command: {command}')
+    result = subprocess.run(command,stdout=subprocess.PIPE,encoding='utf-8',close_fds=False)
+    result.check_returncode()
+    scad = result.stdout
+
+    try:
+        if score_maze:
+            score,maze,metrics = analyze.score_text(scad,weights='',early_threshold=floor)
+            return (score,i,maze,metrics,scad if maze is not None else None)
+        else:
+            # The last part has no maze, and thus, no score or analysis.
+            return (1,i,None,{},scad)
+    except Exception as e:
+        emit(f'Error attempting to score maze.\n#{i} part({part}/{parts})\n{command}\n{e}\n{scad}')
+        emit_flush()
+    return None
 
-        '--helix',  0,            # non-helical (no slope to maze path?)
-        '--part-thickness',  2,   # wall thickness (mm) (wall of the cylinder, not the maze)
-        '--park-thickness',  0.7, # thickness of park ridge to click closed (mm)
-        '--maze-thickness',  2,   # maze thickness (mm); the height of the maze walls
-        '--maze-complexity',  7, # [-10, +10]
-        '--maze-step',  5,        # maze spacing (mm); the (centerline) distance between one cell and the next
-        '--maze-margin',  1,      # maze top margin (mm)
-        '--outer-sides',  0,      # side count (0: round)
 
-        '--fix-nubs',
-    ]
+# Per-worker ({complexity: command}, part, parts, score_maze) for the
+# current gen_maze call
+_JOB = None
 
-    cmdline_args = default_args.copy() + list(puzzlebox_args)
+def _init_job( *job ):
+    global _JOB
+    _JOB = job
 
-    cmdline_args.extend(['--part', part])
+def _gen_job( task ):
+    cplx,i,floor = task
+    commands,part,parts,score_maze = _JOB
+    return _gen_one(i,commands[cplx],part,parts,score_maze,floor)
 
-    puzzlebox_exe = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),'../puzzlebox'))
+
+def _manifold_args():
+    """openscad options selecting the Manifold backend: --backend on newer
+    builds, the experimental feature on older snapshots, nothing otherwise."""
+    try:
+        result = subprocess.run([ 'openscad', '--help' ],capture_output=True,text=True)
+    except OSError:
+        return []
+    usage = result.stdout + result.stderr
+    if '--backend' in usage:
+        return [ '--backend=manifold' ]
+    if 'manifold' in usage:
+        return [ '--enable=manifold' ]
+    return []
+
+
+def _render_stl( outfile, backend_args=() ):
+    started = datetime.datetime.now()
+    subprocess.run([ 'openscad', '-q', *backend_args, outfile, '-o', f'{outfile}.stl'])
+    return outfile, datetime.datetime.now() - started
+
+
+def gen_maze( puzzlebox_args, part=1, count=100, keep=3, parts=6, leaders=None,
+              complexities=(None,), block=10 ):
+    """Generate up to `count` candidates for each of `complexities` (None:
+    leave --maze-complexity to puzzlebox_args/defaults) into one leaderboard.
+
+    The complexities are sampled side by side, `block` candidates at a time
+    (more when that would leave pool workers idle).  Once the leaderboard is full, a complexity whose latest block could not
+    place on it is dropped while another one still could.
+    """
+    if leaders is None:
+        leaders = Leaderboard(keep=keep)
+
+    head = [ PUZZLEBOX_EXE, '--parts', str(parts), *DEFAULT_ARGS ]
+    tail = [ *map(str,puzzlebox_args), '--part', str(part) ]
+    commands = {
+        cplx: head + ([] if cplx is None else ['--maze-complexity', str(cplx)]) + tail
+        for cplx in complexities
+    }
 
     if part == parts:
         count = 1
 
-    for i in range(count):
-        with tempfile.NamedTemporaryFile(suffix='.scad',delete=False) as tmpscad:
-            tmpscad.close() # release lock
-            command = [ puzzlebox_exe ] + list(map(str,cmdline_args)) + [
-                '--out-file', tmpscad.name,
-            ]
-            
-            #print(f'Command: {command}')
-            result = subprocess.run(command)
-            result.check_returncode()
-
-            with open(tmpscad.name,'rt',encoding='utf-8') as _in:
-                scad = _in.read()
-            try:
-                score_maze = True
-                if '--inside' in cmdline_args:
-                    if part == 1:
-                        score_maze = False
-                else:
-                    if part >= parts:
-                        score_maze = False
-                if score_maze:
-                    score,maze,metrics = analyze.score_file(tmpscad.name,weights='')
-                    leaders.add(score,i,maze,metrics,scad)
-                else:
-                    # The last part has no maze, and thus, no score or analysis.
-                    leaders.add(1,i,None,{},scad)
-            except Exception as e:
-                emit(f'Error attempting to score maze.\n#{i} ({tmpscad.name}) part({part}/{parts})\n{command}\n{e}\n{scad}')
-
-            os.remove(tmpscad.name)
+    score_maze = True
+    if '--inside' in puzzlebox_args:
+        if part == 1:
+            score_maze = False
+    else:
+        if part >= parts:
+            score_maze = False
+
+    # A single candidate (e.g. the last part, which has no maze to rank)
+    # isn't worth starting a process pool for.
+    if count == 1 and len(complexities) == 1:
+        result = _gen_one(0,commands[complexities[0]],part,parts,score_maze)
+        if result is not None:
+            leaders.add(*result)
+        return leaders
+
+    # Candidates are independent; run them across processes and rank them here.
+    # The fixed arguments go to each worker once, so tasks only carry
+    # (complexity, index, floor); floor is the leaderboard's lowest score
+    # when the block starts, below which a candidate can't place.
+    live = list(complexities)
+    done = 0
+    floor = None
+    workers = os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                initializer=_init_job,
+                                                initargs=(commands,part,parts,score_maze)) as ex:
+        while live and done < count:
+            # Each block waits for its slowest candidate, so give every
+            # worker at least one task in it.
+            step = max(block,-(-workers // len(live)))
+            batch = [ (cplx,i,floor) for cplx in live for i in range(done,min(done + step,count)) ]
+            done += step
+            best = {}
+            for (cplx,_,_),result in zip(batch,ex.map(_gen_job,batch)):
+                if result is not None:
+                    leaders.add(*result)
+                    best[cplx] = max(best.get(cplx,result[0]),result[0])
+            floor = leaders.floor
+            if floor is not None:
+                placed = [ cplx for cplx in live if cplx in best and best[cplx] >= floor ]
+                if placed:
+                    live = placed
 
     return leaders
 
@@ -126,8 +240,8 @@ if __name__ == '__main__':
     else:
         part_number_range = (cmdline.part,)
 
+    render_jobs = []
     for part_number in part_number_range:
-        lead = None
         count = cmdline.count
         if '--inside' in remaining:
             if part_number == 1:
@@ -136,15 +250,13 @@ if __name__ == '__main__':
             if part_number == cmdline.part_count:
                 count = 1
 
-        for cplx in (7,10) if part_number < cmdline.part_count else (7,):
-            puzzlebox_args = [
-                '--maze-complexity', cplx,
-                '--nubs', nubs[part_number],
-            ] + remaining
+        puzzlebox_args = [
+            '--nubs', nubs[part_number],
+        ] + remaining
 
-            lead = gen_maze(puzzlebox_args, part=part_number, parts=cmdline.part_count,
-                            count=count, keep=cmdline.keep,
-                            leaders=lead)
+        lead = gen_maze(puzzlebox_args, part=part_number, parts=cmdline.part_count,
+                        count=count, keep=cmdline.keep,
+                        complexities=(7,10) if part_number < cmdline.part_count else (7,))
 
         lead_index = 0
         for score,info in lead.keep:
@@ -155,20 +267,32 @@ if __name__ == '__main__':
             if 'human_readable' in metrics:
                 emit('\n'.join(metrics['human_readable']['solution']))
             outfile = f'part-{part_number}.{lead_index:02d}.scad'
-            with open(outfile, 'wt', encoding='utf-8') as _out:
-                print(scad,file=_out)
+            with open(outfile, 'wb') as _out:
+                _out.write(scad.encode('utf-8'))
+                _out.write(b'\n')
             emit(outfile)
+            metrics_json = dict(metrics)
+            metrics_json.pop('human_readable', None)
+            meta = [ f'Difficulty Score: {score}', json.dumps(metrics_json, indent=2) ]
+            if 'human_readable' in metrics:
+                meta.append(f'\n\n{"\n".join(metrics["human_readable"]["visualization"])}')
+                meta.append(f'\n\n{"\n".join(metrics["human_readable"]["solution"])}')
+            # Written section by section rather than joined; the log gets
+            # the same copy emit() would have given it.
             with open(f'{outfile}.meta', 'wt', encoding='utf-8') as _out:
-                emit(f'Difficulty Score: {score}', file=_out)
-                metrics_json = dict(metrics)
-                metrics_json.pop('human_readable', None)
-                emit(json.dumps(metrics_json, indent=2),file=_out)
-                if 'human_readable' in metrics:
-                    emit(f'\n\n{"\n".join(metrics["human_readable"]["visualization"])}',file=_out)
-                    emit(f'\n\n{"\n".join(metrics["human_readable"]["solution"])}',file=_out)
-
-            emit('\nGenerating STL')
-            started = datetime.datetime.now()
-            result = subprocess.run([ 'openscad', '-q', outfile, '-o', f'{outfile}.stl'])
-            elapsed = datetime.datetime.now() - started
+                for stream in (_out, _get_log()):
+                    for section in meta:
+                        stream.write(section)
+                        stream.write('\n')
+
+            render_jobs.append(outfile)
+            emit_flush()
+
+    # openscad is single-threaded, so render all the STLs side by side
+    emit('\nGenerating STL')
+    emit_flush()
+    backend_args = _manifold_args() if render_jobs else []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for outfile,elapsed in ex.map(_render_stl, render_jobs, itertools.repeat(backend_args)):
             emit(f'  {outfile}.stl: {elapsed}')
+            emit_flush()
@@ -1,48 +1,136 @@
 #!/usr/bin/env python3
 
-import sys, os, os.path, subprocess, datetime, argparse, multiprocessing, itertools
+import sys, os, os.path, subprocess, datetime, argparse, multiprocessing.pool, itertools, threading
+
+# One long-lived `puzzlebox --server` per pool thread; jobs are fed over its stdin.
+_local = threading.local()
+_workers = []
+_workers_lock = threading.Lock()
+
+def cpu_list(text):
+    # Parse a kernel CPU list such as "0-3,8,10-11".
+    cpus = set()
+    for part in text.strip().split(','):
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+def allowed_cpus():
+    if not hasattr(os, 'sched_getaffinity'):
+        return []
+    return sorted(os.sched_getaffinity(0))
+
+def physical_cores():
+    # One logical CPU from each set of hyperthread siblings we may run on,
+    # or every such CPU if the topology can't be read.
+    allowed = allowed_cpus()
+    chosen, seen = [], set()
+    for cpu in allowed:
+        try:
+            with open(f'/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list') as f:
+                siblings = frozenset(cpu_list(f.read()))
+        except (OSError, ValueError):
+            return allowed
+        if siblings not in seen:
+            seen.add(siblings)
+            chosen.append(cpu)
+    return chosen
+
+# Workers are pinned in turn to one CPU per physical core, then to those
+# cores' hyperthread siblings; the dispatcher thread is mostly idle and is
+# left unpinned.
+cores = physical_cores()
+cpus = cores + [cpu for cpu in allowed_cpus() if cpu not in cores]
+_next_cpu = itertools.count()
+
+# Options shared by every job, given once to each worker; --part,
+# --maze-complexity and --out-file vary per job.
+BASE_ARGS = list(map(str, [
+    '--parts', 6,            # 5 parts, 4 mazes
+    '--core-diameter', 15,   # size of empty space in smallest
+    '--core-height', 75,     # height of the innermost piece
+    '--nubs', 2,             # count of nubs (2,3)
+    '--base-height', 8,      # "base height" (mm); the height of the base of the part
+
+    '--clearance', 0.4,      # clearance between parts, radius (default: 0.4)
+
+    '--fix-nubs',
+    '--nub-horizontal', 1.0, # scale the size of the nubs
+    '--nub-vertical',   1.0,
+    '--nub-normal',     0.8,
+
+    '--helix', 0,            # non-helical (no slope to maze path?)
+    '--part-thickness', 2,   # wall thickness (mm) (wall of the cylinder, not the maze)
+    '--park-thickness', 1,   # thickness of park ridge to click closed (mm)
+    '--maze-thickness', 2,   # maze thickness (mm); the height of the maze walls
+    '--maze-step', 5,        # maze spacing (mm); the (centerline) distance between one cell and the next
+    '--maze-margin', 1,      # maze top margin (mm)
+    '--outer-sides', 0,      # side count (0: round)
+    #'--stl',
+]))
+
+def puzzlebox_worker():
+    worker = getattr(_local, 'worker', None)
+    if worker is None:
+        # close_fds=False lets Popen use posix_spawn rather than fork+exec;
+        # our own pipes are non-inheritable, so no other worker's fds leak in.
+        worker = subprocess.Popen(['../puzzlebox', '--server'] + BASE_ARGS,
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                  bufsize=1, text=True, close_fds=False)
+        _local.worker = worker
+        with _workers_lock:
+            # A replacement worker keeps its thread's core
+            if not hasattr(_local, 'core') and cpus:
+                _local.core = cpus[next(_next_cpu) % len(cpus)]
+            if hasattr(_local, 'core'):
+                os.sched_setaffinity(worker.pid, {_local.core})
+            _workers.append(worker)
+    return worker
+
+def drop_worker(worker):
+    # The worker died (EOF or broken pipe); the thread's next job starts a new one.
+    _local.worker = None
+    with _workers_lock:
+        _workers.remove(worker)
+    stop_worker(worker)
+
+def stop_worker(worker):
+    try:
+        worker.stdin.close()
+    except OSError:
+        pass
+    worker.wait()
 
 def gen_puzzle( args ):
-    index, complexity, out_dir = args
-    for part in range(1,6):
-        outfile = f'{out_dir}/maze.part-{part:02d}.cplx-{complexity:02d}.{index:03d}.scad'
-        command = [
-            '../puzzlebox',
-
-            '--parts', 6,            # 5 parts, 4 mazes
-            '--part', part,          # which part? (0:all, 1:innermost, ..., <n>:outer)
-            '--core-diameter', 15,   # size of empty space in smallest
-            '--core-height', 75,     # height of the innermost piece
-            '--nubs', 2,             # count of nubs (2,3)
-            '--base-height', 8,      # "base height" (mm); the height of the base of the part
-
-            '--clearance', 0.4,      # clearance between parts, radius (default: 0.4)
-
-            '--fix-nubs',
-            '--nub-horizontal', 1.0, # scale the size of the nubs
-            '--nub-vertical',   1.0,
-            '--nub-normal',     0.8,
-
-            '--helix', 0,            # non-helical (no slope to maze path?)
-            '--part-thickness', 2,   # wall thickness (mm) (wall of the cylinder, not the maze)
-            '--park-thickness', 1,   # thickness of park ridge to click closed (mm)
-            '--maze-thickness', 2,   # maze thickness (mm); the height of the maze walls
-            '--maze-complexity', complexity, # [-10, +10]
-            '--maze-step', 5,        # maze spacing (mm); the (centerline) distance between one cell and the next
-            '--maze-margin', 1,      # maze top margin (mm)
-            '--outer-sides', 0,      # side count (0: round)
-
-            #'--stl',
-            '--out-file', outfile,
-        ]        
-
-        print(f'{outfile}')
-        sys.stdout.flush()
-        started = datetime.datetime.now()
-        subprocess.run(list(map(str,command)))
-        elapsed = datetime.datetime.now() - started
-        info = os.stat(outfile)
-        print(f'{outfile}: {info.st_size/1024/1024:.2f} MiB\n    {elapsed}')
+    index, complexity, part, out_dir = args
+    worker = puzzlebox_worker()
+    outfile = f'{out_dir}/maze.part-{part:02d}.cplx-{complexity:02d}.{index:03d}.scad'
+
+    print(f'{outfile}')
+    sys.stdout.flush()
+    started = datetime.datetime.now()
+    request = f'--part {part} --maze-complexity {complexity} --out-file {outfile}\n'
+    ack = []
+    for attempt in range(2):
+        try:
+            worker.stdin.write(request)
+        except BrokenPipeError:
+            # Exited since its last job, so this one never started: retry it
+            # once on a fresh worker
+            drop_worker(worker)
+            worker = puzzlebox_worker()
+            continue
+        # Ack is "OK <bytes>" (output size) or "FAIL"; EOF means it died on this job
+        ack = worker.stdout.readline().split()
+        if not ack:
+            drop_worker(worker)
+        break
+    elapsed = datetime.datetime.now() - started
+    if not ack or ack[0] != 'OK':
+        print(f'{outfile}: puzzlebox failed ({" ".join(ack) or "worker exited"})')
+        return
+    size = int(ack[1]) if len(ack) > 1 else os.stat(outfile).st_size
+    print(f'{outfile}: {size/1024/1024:.2f} MiB\n    {elapsed}')
 
 
 
@@ -55,5 +143,19 @@ if __name__ == '__main__':
     count = 50
     complexities = [ 7, 10 ]
 
-    with multiprocessing.Pool(11) as pool:
-        pool.map(gen_puzzle, map(lambda args: args+(out_dir,),itertools.product(list(range(50)),complexities)))
+    # One job per part, longest first (higher complexity, inner parts), handed
+    # out one at a time to balance the tail.
+    jobs = ((index, complexity, part, out_dir)
+            for complexity, part, index in itertools.product(sorted(complexities, reverse=True), range(1,6), range(count)))
+
+    # One worker per CPU we may run on, unless PUZZLEBOX_JOBS says otherwise.
+    n_workers = int(os.environ.get('PUZZLEBOX_JOBS', len(cpus) or os.cpu_count() or 1))
+
+    # Threads, not processes: each one just drives its puzzlebox worker.
+    try:
+        with multiprocessing.pool.ThreadPool(n_workers) as pool:
+            for _ in pool.imap_unordered(gen_puzzle, jobs, chunksize=1):
+                pass
+    finally:
+        for worker in _workers:
+            stop_worker(worker)
@@ -7,6 +7,7 @@ Parses and visualizes maze files in human-readable format, showing walls.
 
 import sys
 import argparse
+from operator import or_
 
 
 # Bit flags for maze cells
@@ -16,57 +17,103 @@ FLAG_UP = 0x04     # Up passage (no wall above)
 FLAG_DOWN = 0x08   # Down passage (no wall below)
 FLAG_INVALID = 0x80  # Invalid cell (out of bounds)
 
+# Box-drawing character for a wall junction, indexed by which of its four
+# arms have a wall: up | down << 1 | left << 2 | right << 3
+CORNER_GLYPHS = ' ╵╷│╴└┌├╶┘┐┤─┴┬┼'
+
+# Passage letters for the low four flag bits, padded to 4 characters.
+# U/D are swapped due to display reversal (DOWN in data = UP in display).
+PASSAGE_TEXT = [
+    ''.join(letter for flag, letter in
+            ((FLAG_LEFT, 'L'), (FLAG_RIGHT, 'R'), (FLAG_DOWN, 'U'), (FLAG_UP, 'D'))
+            if bits & flag).ljust(4)
+    for bits in range(16)
+]
+
+# ASCII view of a cell value: (top edge, body, bottom edge, right edge),
+# indexed [show_invalid][value].  An edge is walled where the cell lacks
+# the passage (UP/DOWN swapped due to display reversal) or is invalid.
+ASCII_CELLS = [
+    [(b'+---' if not value & FLAG_DOWN or value & FLAG_INVALID else b'+   ',
+      (b'|' if not value & FLAG_LEFT or value & FLAG_INVALID else b' ')
+      + (invalid_fill if value & FLAG_INVALID else b'   '),
+      b'+---' if not value & FLAG_UP or value & FLAG_INVALID else b'+   ',
+      b'|' if not value & FLAG_RIGHT or value & FLAG_INVALID else b' ')
+     for value in range(256)]
+    for invalid_fill in (b'   ', b'###')
+]
+
+# Unicode view of a cell value: (glyph, wall below, wall above, wall left,
+# wall right), indexed [show_invalid][value].  Walls are the passages a valid
+# cell lacks, with UP/DOWN swapped due to display reversal; an invalid cell
+# has none.
+UNICODE_CELLS = [
+    [(invalid_glyph, False, False, False, False) if value & FLAG_INVALID else
+     ('·', not value & FLAG_DOWN, not value & FLAG_UP,
+      not value & FLAG_LEFT, not value & FLAG_RIGHT)
+     for value in range(256)]
+    for invalid_glyph in (' ', '■')
+]
+
 
 def parse_maze_file(filename):
-    """Parse a PuzzleBox maze file and return maze data."""
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-    
-    # Parse header
-    if not lines[0].strip().startswith('PUZZLEBOX_MAZE'):
-        raise ValueError(f"Invalid maze file: {filename}")
-    
+    """Parse a PuzzleBox maze file and return maze data.
+
+    The file is read in a single streaming pass: header lines up to DATA,
+    then exactly HEIGHT rows of hex cell values.
+    """
     width = None
     height = None
     helix = None
     exit_x = None
-    data_start = None
-    
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if line.startswith('WIDTH'):
-            width = int(line.split()[1])
-        elif line.startswith('HEIGHT'):
-            height = int(line.split()[1])
-        elif line.startswith('HELIX'):
-            helix = int(line.split()[1])
-        elif line.startswith('EXIT_X') or line.startswith('ENTRY_X'):  # Accept both formats
-            exit_x = int(line.split()[1])
-        elif line.startswith('DATA'):
-            data_start = i + 1
-            break
-    
-    if width is None or height is None or data_start is None:
-        raise ValueError("Missing WIDTH, HEIGHT, or DATA in maze file")
-    
-    # Parse maze data
-    maze = [[0 for _ in range(height)] for _ in range(width)]
-    
-    for y in range(height):
-        if data_start + y >= len(lines):
-            raise ValueError(f"Unexpected end of file at row {y}")
-        
-        line = lines[data_start + y].strip()
-        if line == 'END':
-            raise ValueError(f"Premature END marker at row {y}")
-        
-        hex_values = line.split()
-        if len(hex_values) != width:
-            raise ValueError(f"Row {y} has {len(hex_values)} values, expected {width}")
-        
-        for x in range(width):
-            maze[x][y] = int(hex_values[x], 16)
-    
+    has_data = False
+
+    with open(filename, 'r') as f:
+        # Parse header
+        if not f.readline().strip().startswith('PUZZLEBOX_MAZE'):
+            raise ValueError(f"Invalid maze file: {filename}")
+
+        for line in f:
+            line = line.strip()
+            if line.startswith('WIDTH'):
+                width = int(line.split()[1])
+            elif line.startswith('HEIGHT'):
+                height = int(line.split()[1])
+            elif line.startswith('HELIX'):
+                helix = int(line.split()[1])
+            elif line.startswith('EXIT_X') or line.startswith('ENTRY_X'):  # Accept both formats
+                exit_x = int(line.split()[1])
+            elif line.startswith('DATA'):
+                has_data = True
+                break
+
+        if width is None or height is None or not has_data:
+            raise ValueError("Missing WIDTH, HEIGHT, or DATA in maze file")
+
+        # Parse maze data: decode each row in one go, then slice out
+        # one bytearray per column, so cells are maze[x][y]
+        rows = []
+        for y in range(height):
+            line = f.readline()
+            if not line:
+                raise ValueError(f"Unexpected end of file at row {y}")
+
+            line = line.strip()
+            if line == 'END':
+                raise ValueError(f"Premature END marker at row {y}")
+
+            try:
+                row = bytes.fromhex(line)
+            except ValueError:
+                # Not plain two-digit pairs (e.g. single-digit values)
+                row = bytes(int(v, 16) for v in line.split())
+            if len(row) != width:
+                raise ValueError(f"Row {y} has {len(row)} values, expected {width}")
+            rows.append(row)
+
+        flat = b''.join(rows)
+        maze = [bytearray(flat[x::width]) for x in range(width)]
+
     return {
         'width': width,
         'height': height,
@@ -89,125 +136,67 @@ def visualize_maze_ascii(maze_data, show_invalid=False):
     exit_x = maze_data['exit_x']
     maze = maze_data['maze']
     
-    # Find first valid row (top of actual maze)
-    first_valid_y = 0
-    for y in range(height):
-        has_valid = False
-        for x in range(width):
-            if not (maze[x][y] & FLAG_INVALID):
-                has_valid = True
-                break
-        if has_valid:
-            first_valid_y = y
-            break
-    
     # Start point is always at column 0, Y=1 (second row, first row is invalid)
-    start_positions = [(0, 1)]
+    start_x, start_y = 0, 1
     
     # Exit point is at column exit_x, Y=height-1 (top of cylinder, top of display)
-    exit_positions = [(exit_x, height - 1)] if exit_x is not None else []
+    exit_y = height - 1
     
     # Create a grid: each cell is 4 chars wide (+---) and 2 chars tall (top border + content)
     # Plus 1 extra row at bottom for final border
     grid_h = height * 2 + 1
     grid_w = width * 4 + 1
-    grid = [[' ' for _ in range(grid_w)] for _ in range(grid_h)]
+    grid = [bytearray(b' ' * grid_w) for _ in range(grid_h)]
+    # Rows are ASCII bytearrays, each drawn whole from its cells' views
+    # (a zero-width maze leaves them blank)
+    cell_views = ASCII_CELLS[bool(show_invalid)]
+    WALL = b'+---'
+    
+    # A row of nothing but invalid cells (without the start or exit) always
+    # draws the same, so such rows are stamped whole
+    special_rows = {start_y, exit_y} if exit_x is not None else {start_y}
+    invalid_top = WALL * width + b'+'
+    invalid_body = (b'|###' if show_invalid else b'|   ') * width + b'|'
+    exit_in_row = exit_x is not None and 0 <= exit_x < width
     
     # Draw the maze
     for y in range(height):
-        for x in range(width):
-            cell = maze[x][y]
-            
-            # Cell position in grid
-            # Each cell starts at (x*4, y*2)
-            base_x = x * 4
-            base_y = y * 2
-            
-            # Check if this is start or exit
-            is_start = ((x, y) in start_positions)
-            is_exit = ((x, y) in exit_positions)
-            
-            # For exit cell, ignore INVALID flag when drawing passages
-            cell_for_drawing = cell if not is_exit else (cell & ~FLAG_INVALID)
-            
-            # Always draw corner at top-left of this cell
-            grid[base_y][base_x] = '+'
-            
-            # Draw top wall (if no DOWN passage or if invalid) - swapped due to display reversal
-            if not (cell_for_drawing & FLAG_DOWN) or (cell_for_drawing & FLAG_INVALID):
-                grid[base_y][base_x + 1] = '-'
-                grid[base_y][base_x + 2] = '-'
-                grid[base_y][base_x + 3] = '-'
-            
-            # Draw left wall (if no LEFT passage or if invalid)
-            if not (cell_for_drawing & FLAG_LEFT) or (cell_for_drawing & FLAG_INVALID):
-                grid[base_y + 1][base_x] = '|'
-            
-            # Draw cell content
-            
-            if cell & FLAG_INVALID and not is_exit:
-                # Invalid cell (not exit)
-                # Invalid cell
-                if show_invalid:
-                    if is_start:
-                        grid[base_y + 1][base_x + 1] = '#'
-                        grid[base_y + 1][base_x + 2] = 'S'
-                        grid[base_y + 1][base_x + 3] = '#'
-                    elif is_exit:
-                        grid[base_y + 1][base_x + 1] = '#'
-                        grid[base_y + 1][base_x + 2] = 'E'
-                        grid[base_y + 1][base_x + 3] = '#'
-                    else:
-                        grid[base_y + 1][base_x + 1] = '#'
-                        grid[base_y + 1][base_x + 2] = '#'
-                        grid[base_y + 1][base_x + 3] = '#'
-                elif is_start:
-                    # Show start even in invalid cells
-                    grid[base_y + 1][base_x + 1] = ' '
-                    grid[base_y + 1][base_x + 2] = 'S'
-                    grid[base_y + 1][base_x + 3] = ' '
-                elif is_exit:
-                    # Show exit even in invalid cells
-                    grid[base_y + 1][base_x + 1] = ' '
-                    grid[base_y + 1][base_x + 2] = 'E'
-                    grid[base_y + 1][base_x + 3] = ' '
-            else:
-                # Valid cell - show as spaces or mark start/exit
-                if is_start:
-                    grid[base_y + 1][base_x + 1] = ' '
-                    grid[base_y + 1][base_x + 2] = 'S'
-                    grid[base_y + 1][base_x + 3] = ' '
-                elif is_exit:
-                    grid[base_y + 1][base_x + 1] = ' '
-                    grid[base_y + 1][base_x + 2] = 'E'
-                    grid[base_y + 1][base_x + 3] = ' '
-                else:
-                    grid[base_y + 1][base_x + 1] = ' '
-                    grid[base_y + 1][base_x + 2] = ' '
-                    grid[base_y + 1][base_x + 3] = ' '
-            
-            # If this is the last column, draw the right edge
-            if x == width - 1:
-                grid[base_y][base_x + 4] = '+'
-                if not (cell_for_drawing & FLAG_RIGHT) or (cell_for_drawing & FLAG_INVALID):
-                    grid[base_y + 1][base_x + 4] = '|'
-            
-            # If this is the last row, draw the bottom edge
+        cells = [column[y] for column in maze]
+        if y not in special_rows and cells and all(cell & FLAG_INVALID for cell in cells):
+            grid[y * 2][:] = invalid_top
+            grid[y * 2 + 1][:] = invalid_body
             if y == height - 1:
-                grid[base_y + 2][base_x] = '+'
-                if not (cell_for_drawing & FLAG_UP) or (cell_for_drawing & FLAG_INVALID):
-                    grid[base_y + 2][base_x + 1] = '-'
-                    grid[base_y + 2][base_x + 2] = '-'
-                    grid[base_y + 2][base_x + 3] = '-'
-                if x == width - 1:
-                    grid[base_y + 2][base_x + 4] = '+'
+                grid[y * 2 + 2][:] = invalid_top
+            continue
+        if not cells:
+            continue
+        
+        # For exit cell, ignore INVALID flag when drawing passages
+        if y == exit_y and exit_in_row:
+            cells[exit_x] &= ~FLAG_INVALID
+        
+        # Each cell starts at (x*4, y*2); the last column also closes the
+        # right edge, and the last row draws the bottom edge
+        tops, bodies, bottoms, rights = zip(*map(cell_views.__getitem__, cells))
+        base_y = y * 2
+        grid[base_y][:] = b''.join(tops) + b'+'
+        body = grid[base_y + 1]
+        body[:] = b''.join(bodies) + rights[-1]
+        if y == height - 1:
+            grid[base_y + 2][:] = b''.join(bottoms) + b'+'
+        
+        # Start and exit are always marked (start over exit, as the start
+        # is checked first); an exit cell counts as valid here too
+        if y == exit_y and exit_in_row:
+            body[exit_x * 4 + 1:exit_x * 4 + 4] = b' E '
+        if y == start_y and start_x < width:
+            if cells[start_x] & FLAG_INVALID and show_invalid:
+                body[start_x * 4 + 1:start_x * 4 + 4] = b'#S#'
+            else:
+                body[start_x * 4 + 1:start_x * 4 + 4] = b' S '
     
     # Convert grid to string (reversed so top of cylinder shows at top)
-    output = []
-    for row in grid:
-        output.append(''.join(row))
-    
-    return '\n'.join(reversed(output))
+    return '\n'.join(row.decode('ascii') for row in reversed(grid))
 
 
 def visualize_maze_unicode(maze_data, show_invalid=False):
@@ -217,135 +206,78 @@ def visualize_maze_unicode(maze_data, show_invalid=False):
     exit_x = maze_data['exit_x']
     maze = maze_data['maze']
     
-    # Find first valid row (top of actual maze)
-    first_valid_y = 0
-    for y in range(height):
-        has_valid = False
-        for x in range(width):
-            if not (maze[x][y] & FLAG_INVALID):
-                has_valid = True
-                break
-        if has_valid:
-            first_valid_y = y
-            break
-    
     # Start point is always at column 0, Y=1 (second row, first row is invalid)
-    start_positions = [(0, 1)]
+    start_x, start_y = 0, 1
     
     # Exit point is at column exit_x, Y=height-1 (top of cylinder, top of display)
-    exit_positions = [(exit_x, height - 1)] if exit_x is not None else []
+    exit_y = height - 1
     
     # Create a grid that's 2*height+1 by 2*width+1 for drawing
     grid_h = height * 2 + 1
     grid_w = width * 2 + 1
-    grid = [[' ' for _ in range(grid_w)] for _ in range(grid_h)]
+    grid = [[' '] * grid_w for _ in range(grid_h)]
     
     # Track which grid positions have walls
-    h_walls = [[False for _ in range(grid_w)] for _ in range(grid_h)]  # horizontal
-    v_walls = [[False for _ in range(grid_w)] for _ in range(grid_h)]  # vertical
+    h_walls = [[False] * grid_w for _ in range(grid_h)]  # horizontal
+    v_walls = [[False] * grid_w for _ in range(grid_h)]  # vertical
     
-    # First pass: mark all walls
+    # A row of nothing but invalid cells (without the start or exit) has no
+    # walls, only the optional invalid marker
+    special_rows = {start_y, exit_y} if exit_x is not None else {start_y}
+    
+    # First pass: mark all walls, a grid row at a time
+    cell_views = UNICODE_CELLS[bool(show_invalid)]
+    exit_in_row = exit_x is not None and 0 <= exit_x < width
     for y in range(height):
-        for x in range(width):
-            cell = maze[x][y]
-            cx = x * 2 + 1
-            cy = y * 2 + 1
-            
-            # Mark start/exit
-            is_start = ((x, y) in start_positions)
-            is_exit = ((x, y) in exit_positions)
-            
-            # For exit cell, ignore INVALID flag
-            cell_for_walls = cell if not is_exit else (cell & ~FLAG_INVALID)
-            
-            if cell & FLAG_INVALID and not is_exit:
-                if show_invalid:
-                    if is_start:
-                        grid[cy][cx] = 'S'
-                    elif is_exit:
-                        grid[cy][cx] = 'E'
-                    else:
-                        grid[cy][cx] = '■'
-                elif is_start:
-                    grid[cy][cx] = 'S'
-                elif is_exit:
-                    grid[cy][cx] = 'E'
-                continue
-            
-            # Valid cell - mark start/exit or passage
-            if is_start:
-                grid[cy][cx] = 'S'
-            elif is_exit:
-                grid[cy][cx] = 'E'
-            else:
-                grid[cy][cx] = '·'
-            
-            # Mark walls (absence of passages) - swap UP/DOWN due to display reversal
-            if not (cell_for_walls & FLAG_DOWN):
-                h_walls[cy - 1][cx] = True
-            if not (cell_for_walls & FLAG_UP):
-                h_walls[cy + 1][cx] = True
-            if not (cell_for_walls & FLAG_LEFT):
-                v_walls[cy][cx - 1] = True
-            if not (cell_for_walls & FLAG_RIGHT):
-                v_walls[cy][cx + 1] = True
-    
-    # Second pass: draw walls and corners
-    for y in range(grid_h):
-        for x in range(grid_w):
-            # Skip cells (odd positions)
-            if y % 2 == 1 and x % 2 == 1:
-                continue
-            
-            # Horizontal wall
-            if y % 2 == 0 and x % 2 == 1:
-                if h_walls[y][x]:
-                    grid[y][x] = '─'
-            
-            # Vertical wall
-            elif y % 2 == 1 and x % 2 == 0:
-                if v_walls[y][x]:
-                    grid[y][x] = '│'
-            
-            # Corner/intersection
-            elif y % 2 == 0 and x % 2 == 0:
-                up = h_walls[y][x - 1] if x > 0 else False
-                down = h_walls[y][x + 1] if x < grid_w - 1 else False
-                left = v_walls[y - 1][x] if y > 0 else False
-                right = v_walls[y + 1][x] if y < grid_h - 1 else False
-                
-                # Choose appropriate box-drawing character
-                connections = (up, down, left, right)
-                if connections == (True, True, True, True):
-                    grid[y][x] = '┼'
-                elif connections == (True, True, True, False):
-                    grid[y][x] = '├'
-                elif connections == (True, True, False, True):
-                    grid[y][x] = '┤'
-                elif connections == (True, False, True, True):
-                    grid[y][x] = '┴'
-                elif connections == (False, True, True, True):
-                    grid[y][x] = '┬'
-                elif connections == (True, True, False, False):
-                    grid[y][x] = '│'
-                elif connections == (False, False, True, True):
-                    grid[y][x] = '─'
-                elif connections == (True, False, True, False):
-                    grid[y][x] = '└'
-                elif connections == (True, False, False, True):
-                    grid[y][x] = '┘'
-                elif connections == (False, True, True, False):
-                    grid[y][x] = '┌'
-                elif connections == (False, True, False, True):
-                    grid[y][x] = '┐'
-                elif connections == (True, False, False, False):
-                    grid[y][x] = '╵'
-                elif connections == (False, True, False, False):
-                    grid[y][x] = '╷'
-                elif connections == (False, False, True, False):
-                    grid[y][x] = '╴'
-                elif connections == (False, False, False, True):
-                    grid[y][x] = '╶'
+        cells = [column[y] for column in maze]
+        if y not in special_rows and all(cell & FLAG_INVALID for cell in cells):
+            if show_invalid:
+                grid[y * 2 + 1][1::2] = ['■'] * width
+            continue
+        if not cells:
+            continue
+
+        # For exit cell, ignore INVALID flag
+        if y == exit_y and exit_in_row:
+            cells[exit_x] &= ~FLAG_INVALID
+
+        glyphs, below, above, left, right = zip(*map(cell_views.__getitem__, cells))
+        cy = y * 2 + 1
+        row = grid[cy]
+        row[1::2] = glyphs
+        if y == exit_y and exit_in_row:
+            row[exit_x * 2 + 1] = 'E'
+        if y == start_y and start_x < width:
+            row[start_x * 2 + 1] = 'S'
+
+        # The row beneath may already have walled the shared border, and
+        # each vertical border is shared by the cells either side of it
+        h_below = h_walls[cy - 1]
+        h_below[1::2] = map(or_, h_below[1::2], below)
+        h_walls[cy + 1][1::2] = above
+        v_walls[cy][0::2] = map(or_, left + (False,), (False,) + right)
+    
+    # Second pass: draw walls and corners a whole row slice at a time; the
+    # positions that can hold them were left blank by the first pass
+    no_walls = [False] * grid_w
+
+    # Even rows: horizontal walls at odd x, corners/intersections at even x.
+    # The corner at x takes its arms from the walls at x-1 and x+1 (none
+    # past either edge) and from the rows above and below.
+    for y in range(0, grid_h, 2):
+        row = grid[y]
+        h_mid = h_walls[y][1::2]
+        row[1::2] = ['─' if wall else ' ' for wall in h_mid]
+
+        v_left = v_walls[y - 1] if y > 0 else no_walls
+        v_right = v_walls[y + 1] if y < grid_h - 1 else no_walls
+        row[0::2] = [CORNER_GLYPHS[up | down << 1 | left << 2 | right << 3]
+                     for up, down, left, right in
+                     zip([False] + h_mid, h_mid + [False], v_left[0::2], v_right[0::2])]
+
+    # Odd rows: vertical walls at even x (odd x are the cells themselves)
+    for y in range(1, grid_h, 2):
+        grid[y][0::2] = ['│' if wall else ' ' for wall in v_walls[y][0::2]]
     
     # Convert grid to string (reversed so top of cylinder shows at top)
     output = []
@@ -365,37 +297,13 @@ def visualize_maze_text(maze_data, show_invalid=False):
     exit_x = maze_data['exit_x']
     maze = maze_data['maze']
     
-    output = []
+    # Text for every possible cell byte, so each cell is a single lookup
+    invalid_str = "XXXX" if show_invalid else "    "
+    cell_text = [invalid_str if cell & FLAG_INVALID else PASSAGE_TEXT[cell & 0x0F]
+                 for cell in range(256)]
     
-    for y in range(height):
-        row = []
-        for x in range(width):
-            cell = maze[x][y]
-            
-            # Build passage string (swap U/D due to display reversal)
-            passages = ""
-            if cell & FLAG_LEFT:
-                passages += "L"
-            if cell & FLAG_RIGHT:
-                passages += "R"
-            if cell & FLAG_DOWN:  # Swapped: DOWN in data = UP in display
-                passages += "U"
-            if cell & FLAG_UP:    # Swapped: UP in data = DOWN in display
-                passages += "D"
-            
-            # Handle invalid cells
-            if cell & FLAG_INVALID:
-                if show_invalid:
-                    cell_str = "XXXX"
-                else:
-                    cell_str = "    "
-            else:
-                # Pad to 4 characters
-                cell_str = passages.ljust(4)
-            
-            row.append(cell_str)
-        
-        output.append(" ".join(row))
+    output = [" ".join([cell_text[column[y]] for column in maze])
+              for y in range(height)]
     
     # Reverse to match physical orientation
     return '\n'.join(reversed(output))
@@ -461,9 +369,11 @@ def generate_svg(maze_data, output_file, cell_size=40, margin=20):
     # Collect unique wall segments as normalized (x1, y1, x2, y2) tuples
     walls = set()
     for maze_y in range(height):
+        # Only the top row holds the exit, so compare columns alone
+        exit_col = exit_x if maze_y == height - 1 else None
         for x in range(width):
             cell = maze[x][maze_y]
-            is_exit = exit_pos is not None and (x, maze_y) == exit_pos
+            is_exit = x == exit_col
 
             if (cell & FLAG_INVALID) and not is_exit:
                 continue  # skip invalid cells
@@ -624,8 +534,8 @@ def parse_ascii_maze(text):
     
     height = (grid_height - 1) // 2
     
-    # Initialize maze array
-    maze = [[FLAG_INVALID for _ in range(height)] for _ in range(width)]
+    # Initialize maze array (one bytearray per column, as parse_maze_file)
+    maze = [bytearray([FLAG_INVALID]) * height for _ in range(width)]
     
     # Track start and exit positions
     start_x = None
@@ -636,13 +546,15 @@ def parse_ascii_maze(text):
     # Note: Display is reversed, so line 0 is Y=height-1
     for display_y in range(height):
         y = height - 1 - display_y  # Reverse Y coordinate
-        cell_row = display_y * 2 + 1  # Line containing cell content
+        # The cell's line and the border lines above and below it
+        top_line, cell_line, bottom_line = lines[display_y * 2:display_y * 2 + 3]
+        line_len = len(cell_line)
         
         for x in range(width):
             base_x = x * 4
             
             # Check cell content for markers
-            cell_content = lines[cell_row][base_x + 1:base_x + 4].strip()
+            cell_content = cell_line[base_x + 1:base_x + 4].strip()
             
             is_invalid = False
             if 'X' in cell_content or '■' in cell_content:
@@ -662,36 +574,25 @@ def parse_ascii_maze(text):
             # Initialize cell with no passages
             cell = 0x00
             
-            # Check walls (absence of wall = passage exists)
+            # Check walls (absence of wall = passage exists); a border cut
+            # short by the end of its line has no wall
             # Remember: display is reversed, so UP/DOWN are swapped
             
             # Top wall in display = UP in physical maze = DOWN in data (swapped)
-            top_row = display_y * 2
-            if top_row >= 0:
-                top_wall = lines[top_row][base_x + 1:base_x + 4] if base_x + 4 <= len(lines[top_row]) else ""
-                if '---' not in top_wall:
-                    cell |= FLAG_UP  # No wall = passage (but swapped)
+            if top_line[base_x + 1:base_x + 4] != '---':
+                cell |= FLAG_UP  # No wall = passage (but swapped)
             
             # Bottom wall in display = DOWN in physical maze = UP in data (swapped)
-            bottom_row = display_y * 2 + 2
-            if bottom_row < len(lines):
-                bottom_wall = lines[bottom_row][base_x + 1:base_x + 4] if base_x + 4 <= len(lines[bottom_row]) else ""
-                if '---' not in bottom_wall:
-                    cell |= FLAG_DOWN  # No wall = passage (but swapped)
+            if bottom_line[base_x + 1:base_x + 4] != '---':
+                cell |= FLAG_DOWN  # No wall = passage (but swapped)
             
             # Left wall
-            if base_x < len(lines[cell_row]):
-                if lines[cell_row][base_x] != '|':
-                    cell |= FLAG_LEFT  # No wall = passage
+            if base_x < line_len and cell_line[base_x] != '|':
+                cell |= FLAG_LEFT  # No wall = passage
             
-            # Right wall
-            right_x = base_x + 4
-            if right_x < len(lines[cell_row]):
-                if lines[cell_row][right_x] != '|':
-                    cell |= FLAG_RIGHT  # No wall = passage
-            else:
-                # Line too short, assume no wall on right
-                cell |= FLAG_RIGHT
+            # Right wall (line too short: assume no wall on right)
+            if base_x + 4 >= line_len or cell_line[base_x + 4] != '|':
+                cell |= FLAG_RIGHT  # No wall = passage
             
             maze[x][y] = cell
     
@@ -721,11 +622,11 @@ def save_maze_file(maze_data, filename):
             f.write(f"EXIT_X {maze_data['exit_x']}\n")
         f.write("DATA\n")
         
-        # Write maze data
+        # Write maze data: each row's cells as bytes, hex-encoded in one go,
+        # and the whole section in a single write
         maze = maze_data['maze']
-        for y in range(maze_data['height']):
-            row = ' '.join(f"{maze[x][y]:02x}" for x in range(maze_data['width']))
-            f.write(row + '\n')
+        f.write(''.join(bytes([column[y] for column in maze]).hex(' ') + '\n'
+                        for y in range(maze_data['height'])))
         
         f.write("END\n")
 
@@ -8,6 +8,7 @@ Outputs summary to stdout and JSON to stdout when --json is given.
 from __future__ import annotations
 
 import argparse
+import io
 import json
 import re
 from collections import deque
@@ -20,6 +21,11 @@ FLAGU = 0x04
 FLAGD = 0x08
 FLAGI = 0x80
 
+# Machine-readable block patterns, compiled once for every file scored.
+_START_RE = re.compile(r"MAZE_START\s+(INSIDE|OUTSIDE)\s+(\d+)\s+(\d+)\s+(\d+)\s+(-?\d+)\s+(-?\d+)\s+(-?\d+)(?:\s+(-?\d+)\s+(-?\d+)(?:\s+(-?\d+))?)?", re.I)
+_ROW_RE = re.compile(r"MAZE_ROW\s+(-?\d+)\s+(.+)", re.I)
+_PART_RE = re.compile(r"//\s*Part\s+(\d+)\s*(.*)", re.I)
+
 
 class SolutionCell:
     def __init__(self, location: Tuple[int,int], exit_count: int, enter_direction: Optional[str], exit_direction: Optional[str], options: Dict[str, Dict], has_options: bool, straight: bool):
@@ -411,9 +417,6 @@ def score_maze( maze: Maze ) -> float:
     return score
 
 def parse_machine_readable(lines: List[str]) -> Maze:
-    start_re = re.compile(r"MAZE_START\s+(INSIDE|OUTSIDE)\s+(\d+)\s+(\d+)\s+(\d+)\s+(-?\d+)\s+(-?\d+)\s+(-?\d+)(?:\s+(-?\d+)\s+(-?\d+)(?:\s+(-?\d+))?)?", re.I)
-    row_re = re.compile(r"MAZE_ROW\s+(-?\d+)\s+(.+)", re.I)
-
     # locate machine-readable block start
     mr_idx = next((i for i, l in enumerate(lines) if 'machine-readable maze data:' in l.lower()), None)
     if mr_idx is None:
@@ -422,9 +425,8 @@ def parse_machine_readable(lines: List[str]) -> Maze:
     # look backwards for a Part comment near the block
     part = None
     part_text = None
-    part_re = re.compile(r"//\s*Part\s+(\d+)\s*(.*)", re.I)
     for j in range(mr_idx - 1, max(-1, mr_idx - 200), -1):
-        mpart = part_re.search(lines[j])
+        mpart = _PART_RE.search(lines[j])
         if mpart:
             part = int(mpart.group(1))
             part_text = mpart.group(2).strip()
@@ -434,7 +436,7 @@ def parse_machine_readable(lines: List[str]) -> Maze:
     # parse from the machine-readable block forward
     for raw in lines[mr_idx:]:
         line = raw.strip()
-        m = start_re.search(line)
+        m = _START_RE.search(line)
         if m:
             orientation = m.group(1).upper()
             W = int(m.group(2))
@@ -453,13 +455,13 @@ def parse_machine_readable(lines: List[str]) -> Maze:
             maze.maxy_exit = maxy_exit
             continue
 
-        m2 = row_re.search(line)
+        m2 = _ROW_RE.search(line)
         if m2:
             if maze is None:
                 raise RuntimeError("Found MAZE_ROW before MAZE_START")
             rownum = int(m2.group(1))
             hexvals = m2.group(2).strip()
-            parts = [p for p in re.split(r"\s+", hexvals) if p]
+            parts = hexvals.split()
             vals = [int(p, 16) for p in parts]
             maze.set_row(rownum, vals)
             continue
@@ -700,20 +702,36 @@ def main():
         print(json.dumps(metrics_json, indent=2))
 
 
-def score_file(mpath, weights):
+def score_file(mpath, weights, early_threshold=None):
     """Score a maze file using custom scoring logic.
     
     Args:
         mpath: Path to the maze file
         weights: Weight string for scoring
+        early_threshold: If given, a maze scoring below it is returned
+            as (score, None, {}) without the metrics
         
     Returns:
         Tuple of (score, maze, metrics)
     """
     with open(mpath, 'r', encoding='utf-8', errors='ignore') as fh:
-        lines = fh.readlines()
+        return score_lines(fh.readlines(), weights, early_threshold)
+
+
+def score_text(text, weights, early_threshold=None):
+    """Score maze data already read into memory; same result as score_file
+    on a file with this content."""
+    return score_lines(io.StringIO(text, newline=None).readlines(), weights, early_threshold)
+
 
+def score_lines(lines, weights, early_threshold=None):
+    """Score a maze from the file's lines (as readlines() returns them)."""
     maze = parse_machine_readable(lines)
+
+    # The score only needs the solution; skip the metrics when it can't count.
+    score = evaluate_all_turns(maze.solution)
+    if early_threshold is not None and score < early_threshold:
+        return (score, None, {})
     
     # extract human-readable blocks near the machine-readable data
     try:
@@ -728,8 +746,7 @@ def score_file(mpath, weights):
     default_weights = {"connected": 2.0, "unreachable": -5.0, "dead_end": -1.0, "branching": 1.0, "avg_degree": 1.0}
     override = parse_weights(weights)
     weights = {**default_weights, **override}
-    score = compute_score(metrics, weights)
-    metrics['score'] = score
+    metrics['score'] = compute_score(metrics, weights)
     metrics['weights_used'] = weights
     # include part info when available
     if getattr(maze, 'part', None) is not None:
@@ -739,8 +756,6 @@ def score_file(mpath, weights):
     if hr:
         metrics['human_readable'] = hr
 
-    score = evaluate_all_turns(maze.solution)
-
     return (score, maze, metrics)
 
 